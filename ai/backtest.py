@@ -0,0 +1,201 @@
+"""
+Rolling-origin backtesting for the stock forecasters.
+
+Daily sales are laid out as a dense products x days matrix. At every origin
+each model only sees the days before it and forecasts daily demand for every
+product at once (a flat rate or one value per day); that forecast is scored
+against the following horizon days:
+
+- MAPE on total demand over the horizon (product/origin pairs that sold)
+- MASE against the in-sample one-day naive forecast
+- stockout precision/recall: the model predicts a stockout when forecast
+  demand over the horizon reaches the stock on hand at the origin
+
+Stock at each origin is replayed backwards from current inventory with the
+sales and purchases recorded after it (manual adjustments are not replayed).
+Wall-clock time, CPU time and peak traced memory are reported per model so
+the models can be compared on accuracy per CPU second:
+
+    flask backtest --horizon 7 --step 7
+"""
+import time
+import tracemalloc
+
+import numpy as np
+
+from models.database import Product, Inventory, Purchase
+from models.read_routing import analytics_session
+from ai.sales_snapshot import get_sales_snapshot, daily_matrix, to_day
+from ai.forecasting import FORECASTERS
+
+
+def naive_forecast(history, horizon=1):
+    """Yesterday's demand"""
+    return history[:, -1].astype(np.float64)
+
+
+def moving_average_forecast(history, horizon=1, window=7):
+    """Mean daily demand over the last window days"""
+    return history[:, -window:].mean(axis=1)
+
+
+def linear_events_forecast(history, horizon=1):
+    """
+    A per-day approximation of the predict_low_stock model: a line through
+    each product's days with sales, one point per day at its total demand,
+    evaluated at the origin. predict_low_stock fits every sale event, so the
+    two only agree exactly when a product sells at most once a day. Fitted
+    for all products at once from the closed-form least squares sums.
+    """
+    n_products, n_days = history.shape
+    events = history > 0
+    x = np.arange(n_days, dtype=np.float64)
+    n = events.sum(axis=1)
+    sx = events @ x
+    sy = history.sum(axis=1)
+    sxy = history @ x
+    sxx = events @ (x * x)
+
+    denominator = n * sxx - sx * sx
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(denominator > 0, (n * sxy - sx * sy) / denominator, 0.0)
+        intercept = np.where(n > 0, (sy - slope * sx) / n, 0.0)
+    forecast = intercept + slope * n_days
+    # Fewer than two sales is 'Insufficient Data' in predict_low_stock
+    return np.where(n >= 2, np.maximum(forecast, 0.0), 0.0)
+
+
+MODELS = {
+    'naive': naive_forecast,
+    'moving_average': moving_average_forecast,
+    'linear_events': linear_events_forecast,
+}
+MODELS.update(FORECASTERS)
+
+
+def register_model(name, forecast):
+    """Add a forecaster: forecast(history, horizon) -> daily rate or products x horizon matrix"""
+    MODELS[name] = forecast
+
+
+def load_history(days=None, session=None):
+    """Demand and purchase matrices, current stock and the first day of the window"""
+    session = session or analytics_session()
+    product_ids = np.array([pid for (pid,) in session.query(Product.product_id).order_by(Product.product_id)],
+                           dtype=np.int64)
+
+    snapshot = get_sales_snapshot()
+    sale_days = snapshot.arrays()['sale_day']
+    if len(product_ids) == 0 or len(sale_days) == 0:
+        return product_ids, None, np.zeros((len(product_ids), 0)), np.zeros((len(product_ids), 0)), \
+            np.zeros(len(product_ids))
+
+    end_day = int(sale_days.max()) + 1
+    start_day = int(sale_days.min())
+    if days is not None:
+        start_day = max(start_day, end_day - days)
+    demand = snapshot.demand_matrix(product_ids, start_day, end_day)
+
+    # Purchases and stock are only needed to replay stock levels at each origin
+    purchases = session.query(Purchase.product_id, Purchase.purchase_date, Purchase.quantity_purchased).all()
+    if purchases:
+        purchase_ids, purchase_dates, purchase_quantities = zip(*purchases)
+        purchase_days = [to_day(d) for d in purchase_dates]
+        received = daily_matrix(product_ids, start_day, end_day, purchase_ids, purchase_days, purchase_quantities)
+        # Activity after the window still has to be unwound from current stock
+        later = daily_matrix(product_ids, end_day, max(max(purchase_days), end_day) + 1,
+                             purchase_ids, purchase_days, purchase_quantities).sum(axis=1)
+    else:
+        received = np.zeros_like(demand)
+        later = np.zeros(len(product_ids))
+
+    stock = dict.fromkeys(product_ids.tolist(), 0)
+    for product_id, quantity in session.query(Inventory.product_id, Inventory.stock_quantity):
+        if product_id in stock:
+            stock[product_id] += quantity
+    current = np.array([stock[pid] for pid in product_ids.tolist()], dtype=np.float64) - later
+
+    return product_ids, start_day, demand, received, current
+
+
+def stock_at_origins(demand, received, current):
+    """Stock on hand at the start of every day, replayed backwards from current stock"""
+    net_after = np.cumsum((demand - received)[:, ::-1], axis=1)[:, ::-1]
+    return np.maximum(current[:, None] + net_after, 0.0)
+
+
+def _mase_scale(history):
+    """In-sample MAE of the one-day naive forecast per product"""
+    if history.shape[1] < 2:
+        return np.zeros(history.shape[0])
+    return np.abs(np.diff(history, axis=1)).mean(axis=1)
+
+
+def evaluate(forecast, demand, stock, horizon=7, step=7, min_history=14):
+    """Score one model over all rolling origins"""
+    n_products, n_days = demand.shape
+    abs_pct, scaled = [], []
+    tp = fp = fn = 0
+    origins = range(min_history, n_days - horizon + 1, step)
+
+    for origin in origins:
+        history = demand[:, :origin]
+        actual = demand[:, origin:origin + horizon]
+        path = np.maximum(np.asarray(forecast(history, horizon=horizon), dtype=np.float64), 0.0)
+        if path.ndim == 1:
+            path = np.repeat(path[:, None], horizon, axis=1)
+        predicted_total = path.sum(axis=1)
+
+        actual_total = actual.sum(axis=1)
+        sold = actual_total > 0
+        abs_pct.append(np.abs(predicted_total[sold] - actual_total[sold]) / actual_total[sold])
+
+        scale = _mase_scale(history)
+        valid = scale > 0
+        mae = np.abs(actual - path).mean(axis=1)
+        scaled.append(mae[valid] / scale[valid])
+
+        on_hand = stock[:, origin]
+        predicted_out = (predicted_total > 0) & (predicted_total >= on_hand)
+        actual_out = actual_total >= np.maximum(on_hand, 1)
+        tp += int((predicted_out & actual_out).sum())
+        fp += int((predicted_out & ~actual_out).sum())
+        fn += int((~predicted_out & actual_out).sum())
+
+    abs_pct = np.concatenate(abs_pct) if abs_pct else np.array([])
+    scaled = np.concatenate(scaled) if scaled else np.array([])
+    return {
+        'origins': len(origins),
+        'mape': round(float(abs_pct.mean()) * 100, 2) if len(abs_pct) else None,
+        'mase': round(float(scaled.mean()), 3) if len(scaled) else None,
+        'stockout_precision': round(tp / (tp + fp), 3) if tp + fp else None,
+        'stockout_recall': round(tp / (tp + fn), 3) if tp + fn else None,
+    }
+
+
+def run_backtest(models=None, horizon=7, step=7, min_history=14, days=None):
+    """Backtest the named models (all registered ones by default)"""
+    product_ids, start_day, demand, received, current = load_history(days=days)
+    stock = stock_at_origins(demand, received, current)
+
+    results = []
+    for name in models or MODELS:
+        forecast = MODELS[name]
+        tracemalloc.start()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            scores = evaluate(forecast, demand, stock, horizon=horizon, step=step, min_history=min_history)
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        scores.update({
+            'model': name,
+            'products': len(product_ids),
+            'days': demand.shape[1],
+            'wall_ms': round(wall * 1000, 2),
+            'cpu_ms': round(cpu * 1000, 2),
+            'peak_kb': round(peak / 1024, 1),
+        })
+        results.append(scores)
+    return results
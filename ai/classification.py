@@ -0,0 +1,116 @@
+"""
+ABC/XYZ product classification.
+
+ABC ranks products by revenue (price x units sold) over the last
+CLASS_WINDOW_DAYS: the products making up the first 80% of revenue are A,
+the next 15% B and the rest C. XYZ grades demand variability by the
+coefficient of variation of weekly units sold: X is steady (CV <= 0.5),
+Y fluctuating (<= 1.0) and Z erratic or without sales.
+
+Both are computed for the whole catalogue at once from the sales snapshot's
+demand matrix, and cached for CLASSIFICATION_TTL seconds since classes only
+drift slowly. predict_low_stock uses them to decide how often each product's
+forecast is recomputed (REFRESH_SECONDS): A items every few minutes, C items
+once a day.
+"""
+from datetime import datetime
+
+import numpy as np
+
+from models.database import Product
+from models.read_routing import analytics_session
+from ai.sales_snapshot import get_sales_snapshot, to_day
+from ai.singleflight import SingleFlight
+
+CLASS_WINDOW_DAYS = 364  # 52 whole weeks
+ABC_CUTOFFS = (0.80, 0.95)  # cumulative revenue share closing classes A and B
+XYZ_CUTOFFS = (0.5, 1.0)  # weekly demand CV closing classes X and Y
+CLASSIFICATION_TTL = 3600  # seconds
+
+# How long a product's forecast is reused, by ABC class
+REFRESH_SECONDS = {
+    'A': 300,
+    'B': 3600,
+    'C': 24 * 3600,
+}
+
+classification_flight = SingleFlight(ttl=CLASSIFICATION_TTL)
+
+
+def abc_classes(revenue, cutoffs=ABC_CUTOFFS):
+    """'A'/'B'/'C' per product from revenue, by cumulative share of the total"""
+    revenue = np.asarray(revenue, dtype=np.float64)
+    classes = np.full(len(revenue), 'C', dtype='<U1')
+    total = revenue.sum()
+    if total <= 0:
+        return classes
+    order = np.argsort(-revenue, kind='stable')
+    # Share of revenue ranked above each product, so the top seller is always A
+    share_before = (np.cumsum(revenue[order]) - revenue[order]) / total
+    ranked = np.where(share_before < cutoffs[0], 'A', np.where(share_before < cutoffs[1], 'B', 'C'))
+    classes[order] = np.where(revenue[order] > 0, ranked, 'C')
+    return classes
+
+
+def demand_cv(demand, period=7):
+    """Coefficient of variation of demand summed per period (inf without sales)"""
+    demand = np.asarray(demand, dtype=np.float64)
+    n_periods = demand.shape[1] // period
+    # Whole periods, counted back from the most recent day
+    periods = demand[:, demand.shape[1] - n_periods * period:].reshape(len(demand), n_periods, period).sum(axis=2)
+    mean = periods.mean(axis=1) if n_periods else np.zeros(len(demand))
+    std = periods.std(axis=1) if n_periods else np.zeros(len(demand))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(mean > 0, std / mean, np.inf)
+
+
+def xyz_classes(cv, cutoffs=XYZ_CUTOFFS):
+    """'X'/'Y'/'Z' per product from the demand coefficient of variation"""
+    cv = np.asarray(cv, dtype=np.float64)
+    return np.where(cv <= cutoffs[0], 'X', np.where(cv <= cutoffs[1], 'Y', 'Z'))
+
+
+def classify_products(days=CLASS_WINDOW_DAYS, session=None):
+    """ABC/XYZ class, revenue and demand CV of every product over the last `days`"""
+    session = session or analytics_session()
+    products = session.query(Product.product_id, Product.price).order_by(Product.product_id).all()
+    if not products:
+        return {}
+    product_ids = np.array([product_id for product_id, _ in products], dtype=np.int64)
+    prices = np.array([price or 0 for _, price in products], dtype=np.float64)
+
+    end_day = to_day(datetime.now().date()) + 1
+    demand = get_sales_snapshot().demand_matrix(product_ids, end_day - days, end_day)
+    units = demand.sum(axis=1)
+    revenue = units * prices
+    cv = demand_cv(demand)
+    abc, xyz = abc_classes(revenue), xyz_classes(cv)
+    total = revenue.sum()
+
+    return {
+        int(product_id): {
+            'abc': str(abc[i]),
+            'xyz': str(xyz[i]),
+            'units': int(units[i]),
+            'revenue': round(float(revenue[i]), 2),
+            'revenue_share': round(float(revenue[i] * 100 / total), 2) if total > 0 else 0.0,
+            'cv': round(float(cv[i]), 2) if np.isfinite(cv[i]) else None,
+        }
+        for i, product_id in enumerate(product_ids)
+    }
+
+
+def get_product_classes():
+    """Cached classification of the current catalogue"""
+    return classification_flight.do('product_classes', classify_products)
+
+
+def refresh_product_classes():
+    """Recompute the classification now (the `flask classify-products` job)"""
+    classification_flight.invalidate()
+    return get_product_classes()
+
+
+def refresh_interval(product_class):
+    """Seconds a forecast stays fresh for a product of this ABC class"""
+    return REFRESH_SECONDS.get(product_class, REFRESH_SECONDS['C'])
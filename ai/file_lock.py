@@ -0,0 +1,30 @@
+"""
+Advisory file locks for coordinating worker processes.
+
+Uses fcntl.flock where available; on platforms without fcntl (Windows) the
+lock is a no-op and only in-process locking applies.
+"""
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class FileLock:
+    """Exclusive lock on a file, held for the duration of a with block"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._file = open(self.path, 'w')
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
@@ -0,0 +1,84 @@
+"""
+Vectorized demand forecasting across all products.
+
+Every model takes a dense products x days demand matrix (zero-sale days
+included) and returns a products x horizon matrix of forecast daily demand.
+The smoothing recursions step through the days once and update every product
+at the same time with NumPy array operations, so the cost grows with the
+number of days rather than with one model fit per product.
+
+- holt_winters: additive level, damped trend and weekly seasonality; falls
+  back to level and trend only with less than two weeks of history
+- croston: Syntetos-Boylan corrected Croston for intermittent demand
+"""
+import numpy as np
+
+SEASON = 7
+
+
+def holt_winters(demand, horizon=1, alpha=0.3, beta=0.05, gamma=0.2, phi=0.9, season=SEASON):
+    """Additive Holt-Winters with a damped trend"""
+    demand = np.asarray(demand, dtype=np.float64)
+    n_products, n_days = demand.shape
+    if n_days == 0:
+        return np.zeros((n_products, horizon))
+
+    seasonal_fit = n_days >= 2 * season
+    if seasonal_fit:
+        first = demand[:, :season]
+        level = first.mean(axis=1)
+        trend = (demand[:, season:2 * season].mean(axis=1) - level) / season
+        seasonal = first - level[:, None]
+        start = season
+    else:
+        level = demand[:, 0].copy()
+        trend = np.zeros(n_products)
+        seasonal = np.zeros((n_products, season))
+        start = 1
+
+    for t in range(start, n_days):
+        s = seasonal[:, t % season]
+        previous = level
+        level = alpha * (demand[:, t] - s) + (1 - alpha) * (previous + phi * trend)
+        trend = beta * (level - previous) + (1 - beta) * phi * trend
+        if seasonal_fit:
+            seasonal[:, t % season] = gamma * (demand[:, t] - level) + (1 - gamma) * s
+
+    steps = np.arange(1, horizon + 1)
+    damping = np.cumsum(phi ** steps)
+    forecast = level[:, None] + trend[:, None] * damping + seasonal[:, (n_days + steps - 1) % season]
+    return np.maximum(forecast, 0.0)
+
+
+def croston(demand, horizon=1, alpha=0.1):
+    """Croston's method with the Syntetos-Boylan bias correction"""
+    demand = np.asarray(demand, dtype=np.float64)
+    n_products, n_days = demand.shape
+    sold_days = (demand > 0).sum(axis=1)
+    seen = sold_days > 0
+    first_sale = np.argmax(demand > 0, axis=1)
+
+    # Start from the history averages rather than the first observation, so a
+    # long gap before a product's first sale doesn't dominate its interval
+    with np.errstate(divide='ignore', invalid='ignore'):
+        size = np.where(seen, demand.sum(axis=1) / sold_days, 0.0)  # smoothed non-zero demand
+        interval = np.where(seen, (n_days - first_sale) / sold_days, 0.0)  # smoothed days between demands
+    since = np.zeros(n_products)
+
+    for t in range(n_days):
+        since += 1
+        sold = demand[:, t] > 0
+        update = sold & (first_sale < t)
+        size[update] += alpha * (demand[update, t] - size[update])
+        interval[update] += alpha * (since[update] - interval[update])
+        since[sold] = 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(seen, (1 - alpha / 2) * size / interval, 0.0)
+    return np.repeat(rate[:, None], horizon, axis=1)
+
+
+FORECASTERS = {
+    'holt_winters': holt_winters,
+    'croston': croston,
+}
@@ -1,29 +1,112 @@
+import time
 import pandas as pd
 import numpy as np
 from sklearn.linear_model import LinearRegression
 from datetime import datetime, timedelta
-from models.database import Product, Sale, Inventory, db
+from models.database import Product, Inventory
+from models.read_routing import analytics_session
+from models.stock_index import DEFAULT_LOW_STOCK_THRESHOLD
+from models.tenancy import tenant_local
+from ai.sales_snapshot import get_sales_snapshot, to_day, from_day
+from ai.singleflight import single_flight
+from ai.forecasting import FORECASTERS, SEASON
+from ai.classification import get_product_classes, refresh_interval
 
-def predict_low_stock():
+FORECAST_MODELS = ('linear',) + tuple(FORECASTERS)
+HISTORY_DAYS = 365  # days of demand the smoothing models look back over
+
+# (model, product_id) -> (computed at, predicted_sales, daily_rate, model_score),
+# reused until the product's ABC class says it is due again
+_forecasts = tenant_local({}, lambda tenant: {})
+
+def _succeeded(result):
+    """Only share and cache results that didn't fail"""
+    return result.get('success', False)
+
+def _sales_by_product(columns, only=None):
+    """Map product_id -> (days, quantities) arrays, each sorted by day, for the `only` products (default all)"""
+    product_ids, days, quantities = columns['product_id'], columns['sale_day'], columns['quantity']
+    if only is not None:
+        # Sort just the rows of the products asked for, not the whole history
+        mask = np.isin(product_ids, np.asarray(only, dtype=product_ids.dtype))
+        product_ids, days, quantities = product_ids[mask], days[mask], quantities[mask]
+    if len(product_ids) == 0:
+        return {}
+    order = np.lexsort((days, product_ids))
+    sorted_ids = product_ids[order]
+    days = days[order]
+    quantities = quantities[order]
+    unique_ids, starts = np.unique(sorted_ids, return_index=True)
+    ends = np.append(starts[1:], len(sorted_ids))
+    return {
+        int(pid): (days[start:end], quantities[start:end])
+        for pid, start, end in zip(unique_ids, starts, ends)
+    }
+
+def _smoothed_forecasts(model, product_ids, today):
+    """Next-day and mean daily demand over the coming week for every product"""
+    start_day = today - HISTORY_DAYS + 1
+    demand = get_sales_snapshot().demand_matrix(product_ids, start_day, today + 1)
+    path = FORECASTERS[model](demand, horizon=SEASON)
+    return {
+        product_id: (float(path[i, 0]), float(path[i].mean()))
+        for i, product_id in enumerate(product_ids)
+    }
+
+@single_flight('predict_low_stock', cacheable=_succeeded)
+def predict_low_stock(model='linear'):
     """
     Predicts which products will run out of stock soon based on historical sales data.
-    Uses Linear Regression to forecast next day sales.
+    Uses Linear Regression to forecast next day sales, or with model='holt_winters' /
+    'croston' smooths the daily demand of all products at once.
+    Forecasts are only recomputed once due for the product's ABC class
+    (ai/classification.py); stock levels and statuses are always current.
     """
     try:
+        if model not in FORECAST_MODELS:
+            raise ValueError(f'Unknown model: {model}')
         predictions = []
+        session = analytics_session()
         
-        # Get all products
-        products = Product.query.all()
+        # Get all products and their stock in two queries
+        products = session.query(Product).all()
+        stock_by_product = {}
+        for product_id, stock_quantity, threshold in session.query(
+            Inventory.product_id, Inventory.stock_quantity, Inventory.low_stock_threshold
+        ).order_by(Inventory.inventory_id):
+            stock_by_product.setdefault(product_id, (stock_quantity, threshold))
         
+        # Sales history comes from the columnar snapshot; every product's sale count is cheap
+        columns = get_sales_snapshot().arrays()
+        max_product_id = max((product.product_id for product in products), default=0)
+        sale_counts = np.bincount(columns['product_id'], minlength=max_product_id + 1)
+        today = to_day(datetime.now().date())
+        classes = get_product_classes()
+        now = time.monotonic()
+        forecasts = {}
         for product in products:
-            # Get sales history for this product
-            sales = Sale.query.filter_by(product_id=product.product_id).order_by(Sale.sale_date).all()
+            cached = _forecasts.get((model, product.product_id))
+            # Products added since the classification ran have no class yet and are always due
+            product_class = classes.get(product.product_id, {}).get('abc')
+            if cached is not None and product_class is not None and now - cached[0] < refresh_interval(product_class):
+                forecasts[product.product_id] = cached[1:]
+        # Products with too few sales for a forecast are never due
+        due = [product.product_id for product in products
+               if product.product_id not in forecasts and sale_counts[product.product_id] >= 2]
+        if model == 'linear':
+            # Only the products being re-forecast need their history grouped
+            sales_by_product = _sales_by_product(columns, only=due) if due else {}
+        else:
+            smoothed = _smoothed_forecasts(model, due, today) if due else {}
+        
+        for product in products:
+            current_stock, threshold = stock_by_product.get(product.product_id, (0, DEFAULT_LOW_STOCK_THRESHOLD))
+            n_sales = int(sale_counts[product.product_id])
+            
+            product_class = classes.get(product.product_id, {})
             
-            if not sales or len(sales) < 2:
+            if n_sales < 2:
                 # Not enough data for prediction
-                inventory = Inventory.query.filter_by(product_id=product.product_id).first()
-                current_stock = inventory.stock_quantity if inventory else 0
-                
                 predictions.append({
                     'product_id': product.product_id,
                     'product_name': product.product_name,
@@ -32,65 +115,68 @@ def predict_low_stock():
                     'predicted_sales': 0,
                     'days_until_stockout': 'N/A',
                     'status': 'Insufficient Data',
-                    'confidence': 'Low'
+                    'confidence': 'Low',
+                    'abc_class': product_class.get('abc'),
+                    'xyz_class': product_class.get('xyz')
                 })
                 continue
             
-            # Prepare data for regression
-            # Convert dates to numerical values (days since first sale)
-            first_sale_date = sales[0].sale_date
-            X = []
-            y = []
-            
-            for sale in sales:
-                days_diff = (sale.sale_date - first_sale_date).days
-                X.append([days_diff])
-                y.append(sale.quantity_sold)
-            
-            X = np.array(X)
-            y = np.array(y)
-            
-            # Train linear regression model
-            model = LinearRegression()
-            model.fit(X, y)
-            
-            # Predict sales for next day
-            last_sale_date = sales[-1].sale_date
-            days_since_first = (datetime.now().date() - first_sale_date).days
-            predicted_sales = model.predict([[days_since_first]])[0]
-            
-            # Ensure prediction is not negative
-            predicted_sales = max(0, predicted_sales)
+            if product.product_id in forecasts:
+                predicted_sales, daily_rate, model_score = forecasts[product.product_id]
+            elif model == 'linear':
+                # Prepare data for regression
+                # Convert dates to numerical values (days since first sale)
+                days, quantities = sales_by_product[product.product_id]
+                first_sale_day = int(days[0])
+                X = (days - first_sale_day).reshape(-1, 1).astype(np.float64)
+                y = np.asarray(quantities, dtype=np.float64)
+                
+                # Train linear regression model
+                regression = LinearRegression()
+                regression.fit(X, y)
+                
+                # Predict sales for next day
+                days_since_first = today - first_sale_day
+                predicted_sales = regression.predict([[days_since_first]])[0]
+                
+                # Ensure prediction is not negative
+                predicted_sales = max(0, predicted_sales)
+                daily_rate = predicted_sales
+                model_score = round(regression.score(X, y), 2) if len(X) > 1 else 0
+            else:
+                # Weekly average so a quiet weekday doesn't hide a stockout
+                predicted_sales, daily_rate = smoothed[product.product_id]
+                model_score = None
             
-            # Get current stock
-            inventory = Inventory.query.filter_by(product_id=product.product_id).first()
-            current_stock = inventory.stock_quantity if inventory else 0
+            # Reuse this forecast until the product's class is due again
+            if product.product_id not in forecasts:
+                _forecasts[(model, product.product_id)] = (now, predicted_sales, daily_rate, model_score)
             
             # Calculate days until stockout
-            if predicted_sales > 0:
-                days_until_stockout = int(current_stock / predicted_sales)
+            if daily_rate > 0:
+                days_until_stockout = int(current_stock / daily_rate)
             else:
                 days_until_stockout = 999  # Essentially infinite
             
             # Determine status
-            if days_until_stockout <= 3 and predicted_sales > 0:
+            if days_until_stockout <= 3 and daily_rate > 0:
                 status = '⚠️ Critical - Low Stock'
-            elif days_until_stockout <= 7 and predicted_sales > 0:
+            elif days_until_stockout <= 7 and daily_rate > 0:
                 status = '⚠️ Warning - Stock Running Low'
-            elif current_stock < 10:
+            elif current_stock < threshold:
                 status = '⚠️ Low Stock'
             else:
                 status = '✅ Healthy Stock'
             
             # Calculate confidence based on number of data points
-            if len(sales) >= 5:
+            if n_sales >= 5:
                 confidence = 'High'
-            elif len(sales) >= 3:
+            elif n_sales >= 3:
                 confidence = 'Medium'
             else:
                 confidence = 'Low'
             
-            predictions.append({
+            prediction = {
                 'product_id': product.product_id,
                 'product_name': product.product_name,
                 'category': product.category,
@@ -99,8 +185,12 @@ def predict_low_stock():
                 'days_until_stockout': days_until_stockout if days_until_stockout < 999 else 'N/A',
                 'status': status,
                 'confidence': confidence,
-                'model_score': round(model.score(X, y), 2) if len(X) > 1 else 0
-            })
+                'abc_class': product_class.get('abc'),
+                'xyz_class': product_class.get('xyz')
+            }
+            if model_score is not None:
+                prediction['model_score'] = model_score
+            predictions.append(prediction)
         
         # Sort by days until stockout (critical items first)
         predictions.sort(key=lambda x: x['days_until_stockout'] if isinstance(x['days_until_stockout'], int) else 999)
@@ -108,6 +198,7 @@ def predict_low_stock():
         return {
             'success': True,
             'predictions': predictions,
+            'model': model,
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
     
@@ -118,26 +209,19 @@ def predict_low_stock():
             'predictions': []
         }
 
+@single_flight('sales_trend', cacheable=_succeeded)
 def get_sales_trend_data():
     """
     Get sales trend data for visualization
     """
     try:
-        # Get sales for last 30 days
+        # Get sales for last 30 days, summed per day from the snapshot
         thirty_days_ago = datetime.now().date() - timedelta(days=30)
-        sales = Sale.query.filter(Sale.sale_date >= thirty_days_ago).order_by(Sale.sale_date).all()
-        
-        # Aggregate by date
-        sales_by_date = {}
-        for sale in sales:
-            date_str = sale.sale_date.strftime('%Y-%m-%d')
-            if date_str not in sales_by_date:
-                sales_by_date[date_str] = 0
-            sales_by_date[date_str] += sale.quantity_sold
+        days, totals = get_sales_snapshot().daily_totals(since_day=to_day(thirty_days_ago))
         
         # Convert to lists for Chart.js
-        dates = sorted(sales_by_date.keys())
-        quantities = [sales_by_date[date] for date in dates]
+        dates = [from_day(day).strftime('%Y-%m-%d') for day in days]
+        quantities = totals.tolist()
         
         return {
             'success': True,
@@ -151,21 +235,21 @@ def get_sales_trend_data():
             'error': str(e)
         }
 
+@single_flight('category_sales', cacheable=_succeeded)
 def get_category_sales():
     """
     Get sales distribution by category
     """
     try:
-        products = Product.query.all()
+        products = analytics_session().query(Product.product_id, Product.category).all()
+        max_product_id = max((product_id for product_id, _ in products), default=0)
+        totals = get_sales_snapshot().product_totals(size=max_product_id + 1)
         category_sales = {}
         
-        for product in products:
-            sales = Sale.query.filter_by(product_id=product.product_id).all()
-            total_sold = sum(sale.quantity_sold for sale in sales)
-            
-            if product.category not in category_sales:
-                category_sales[product.category] = 0
-            category_sales[product.category] += total_sold
+        for product_id, category in products:
+            if category not in category_sales:
+                category_sales[category] = 0
+            category_sales[category] += int(totals[product_id])
         
         return {
             'success': True,
@@ -0,0 +1,202 @@
+"""
+Columnar, memory-mapped copy of the sales table for analytics.
+
+Each column of (sale_id, product_id, sale_day, quantity) lives in its own raw
+little-endian NumPy file under SALES_SNAPSHOT_DIR, with meta.json holding the
+committed row count and the highest sale_id copied. sync() appends only rows
+with a newer sale_id; if rows below that id disappeared (delete_sale) the
+files are rebuilt. Readers get np.memmap views, so no Sale objects are built.
+Rows are read from the hot sales table and every archived year alike.
+
+sale_day is stored as days since 1970-01-01.
+"""
+import json
+import os
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import func, select
+
+from models.tenancy import TenantRegistry, tenant_dir
+from models.read_routing import analytics_session
+from models.sales_partitions import sales_source
+from ai.file_lock import FileLock
+
+EPOCH = date(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+
+COLUMNS = {
+    'sale_id': np.dtype('<i8'),
+    'product_id': np.dtype('<i4'),
+    'sale_day': np.dtype('<i4'),
+    'quantity': np.dtype('<i4'),
+}
+
+
+def to_day(value):
+    """date -> days since epoch"""
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+def from_day(day):
+    """days since epoch -> date"""
+    return EPOCH + timedelta(days=int(day))
+
+
+class SalesSnapshot:
+    """Append-only column files for the sales table"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._opened = None
+        self._arrays = None
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read_meta(self):
+        try:
+            with open(self._path('meta.json')) as f:
+                meta = json.load(f)
+            return meta['rows'], meta['last_sale_id']
+        except (OSError, ValueError, KeyError):
+            return 0, 0
+
+    def _write_meta(self, rows, last_sale_id):
+        tmp_path = self._path('meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'rows': rows, 'last_sale_id': last_sale_id}, f)
+        os.replace(tmp_path, self._path('meta.json'))
+
+    def sync(self, session=None):
+        """Bring the column files up to date with the sales table"""
+        session = session or analytics_session()
+        with self._lock, FileLock(self._path('.lock')):
+            rows, last_sale_id = self._read_meta()
+            sales = sales_source(session=session)
+
+            copied = session.execute(
+                select(func.count()).select_from(sales).where(sales.c.sale_id <= last_sale_id)
+            ).scalar()
+            rebuild = copied != rows or not os.path.exists(self._path('sale_id.bin'))
+            if rebuild:
+                rows, last_sale_id = 0, 0
+
+            new_rows = session.execute(
+                select(sales.c.sale_id, sales.c.product_id, sales.c.sale_date, sales.c.quantity_sold)
+                .where(sales.c.sale_id > last_sale_id)
+                .order_by(sales.c.sale_id)
+            ).all()
+
+            if new_rows or rebuild:
+                self._write(rows, new_rows, rebuild)
+                rows += len(new_rows)
+                if new_rows:
+                    last_sale_id = new_rows[-1][0]
+                self._write_meta(rows, last_sale_id)
+
+            # Re-map after appends here or a rebuild (new inode) by another worker
+            opened = (rows, os.stat(self._path('sale_id.bin')).st_ino)
+            if opened != self._opened:
+                self._arrays = self._open(rows)
+                self._opened = opened
+        return self
+
+    def _write(self, rows, new_rows, rebuild):
+        sale_ids, product_ids, sale_dates, quantities = zip(*new_rows) if new_rows else ((), (), (), ())
+        columns = {
+            'sale_id': sale_ids,
+            'product_id': product_ids,
+            'sale_day': [to_day(d) for d in sale_dates],
+            'quantity': quantities,
+        }
+        for name, dtype in COLUMNS.items():
+            path = self._path(f'{name}.bin')
+            if rebuild:
+                # Write a new file and swap it in; existing memmaps keep the old one
+                with open(path + '.tmp', 'wb') as f:
+                    np.asarray(columns[name], dtype=dtype).tofile(f)
+                os.replace(path + '.tmp', path)
+            else:
+                with open(path, 'ab') as f:
+                    # Drop anything past the committed row count (interrupted append)
+                    f.truncate(rows * dtype.itemsize)
+                    np.asarray(columns[name], dtype=dtype).tofile(f)
+
+    def _open(self, rows):
+        if rows == 0:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        return {
+            name: np.memmap(self._path(f'{name}.bin'), dtype=dtype, mode='r', shape=(rows,))
+            for name, dtype in COLUMNS.items()
+        }
+
+    def arrays(self):
+        """Read-only column arrays: sale_id, product_id, sale_day, quantity"""
+        self.sync()
+        return self._arrays
+
+    def daily_totals(self, since_day=None):
+        """(days, quantities) summed per sale day, optionally from since_day on"""
+        columns = self.arrays()
+        days, quantities = columns['sale_day'], columns['quantity']
+        if since_day is not None:
+            mask = days >= since_day
+            days, quantities = days[mask], quantities[mask]
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        totals = np.bincount(inverse, weights=quantities, minlength=len(unique_days))
+        return unique_days, totals.astype(np.int64)
+
+    def product_totals(self, size=0):
+        """Total quantity sold indexed by product_id"""
+        columns = self.arrays()
+        if len(columns['product_id']) == 0:
+            return np.zeros(size, dtype=np.int64)
+        totals = np.bincount(columns['product_id'], weights=columns['quantity'], minlength=size)
+        return totals.astype(np.int64)
+
+    def demand_matrix(self, product_ids, start_day, end_day):
+        """Dense (len(product_ids), end_day - start_day) matrix of units sold per day"""
+        columns = self.arrays()
+        product_ids = np.asarray(product_ids, dtype=np.int64)
+        n_days = end_day - start_day
+        if len(product_ids) == 0 or n_days <= 0:
+            return np.zeros((len(product_ids), max(n_days, 0)))
+        return daily_matrix(product_ids, start_day, end_day, columns['product_id'],
+                            columns['sale_day'], columns['quantity'])
+
+
+def daily_matrix(product_ids, start_day, end_day, row_product_ids, row_days, row_quantities):
+    """Sum (product_id, day, quantity) rows into a products x days matrix"""
+    n_days = end_day - start_day
+    row_product_ids = np.asarray(row_product_ids, dtype=np.int64)
+    row_days = np.asarray(row_days, dtype=np.int64)
+    row_of = np.full(max(int(product_ids.max()), int(row_product_ids.max(initial=0))) + 1, -1, dtype=np.int64)
+    row_of[product_ids] = np.arange(len(product_ids))
+
+    rows = row_of[row_product_ids]
+    mask = (rows >= 0) & (row_days >= start_day) & (row_days < end_day)
+    flat = rows[mask] * n_days + (row_days[mask] - start_day)
+    totals = np.bincount(flat, weights=np.asarray(row_quantities)[mask], minlength=len(product_ids) * n_days)
+    return totals.reshape(len(product_ids), n_days)
+
+
+def init_sales_snapshot(app):
+    """Attach a SalesSnapshot stored in SALES_SNAPSHOT_DIR to the app"""
+    app.config.setdefault('SALES_SNAPSHOT_DIR', os.path.join(app.instance_path, 'sales_snapshot'))
+    app.extensions['sales_snapshot'] = TenantRegistry(
+        SalesSnapshot(app.config['SALES_SNAPSHOT_DIR']),
+        lambda tenant: SalesSnapshot(os.path.join(tenant_dir(tenant), 'sales_snapshot'))
+    )
+    return app.extensions['sales_snapshot'].default
+
+
+def get_sales_snapshot():
+    """The current app's (and tenant's) snapshot, created on first use"""
+    if 'sales_snapshot' not in current_app.extensions:
+        init_sales_snapshot(current_app)
+    return current_app.extensions['sales_snapshot'].get()
@@ -0,0 +1,164 @@
+"""
+Single-flight request coalescing for expensive analytics.
+
+When many requests ask for the same result at once, the first caller computes
+it and the others wait on that one in-flight call and share its result. The
+result is then cached for ANALYTICS_CACHE_TTL seconds.
+
+If ANALYTICS_SHARED_CACHE_DIR is set, worker processes coordinate as well:
+the computing process holds a file lock per key and writes the result to a
+pickle file that the others reuse while it is fresh.
+
+Keys are scoped to the current tenant, so tenants never share results.
+"""
+import functools
+import os
+import pickle
+import threading
+import time
+
+from ai.file_lock import FileLock
+from models.tenancy import current_tenant
+
+
+class _Call:
+    """A computation in progress that other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls per key and caches results briefly"""
+
+    def __init__(self, ttl=5.0, shared_dir=None):
+        self.ttl = ttl
+        self.shared_dir = shared_dir
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._cache = {}
+        self._last_sweep = time.monotonic()
+
+    def configure(self, ttl=None, shared_dir=None):
+        if ttl is not None:
+            self.ttl = ttl
+        self.shared_dir = shared_dir
+        if shared_dir:
+            os.makedirs(shared_dir, exist_ok=True)
+
+    def do(self, key, func, cacheable=None):
+        """Return func()'s result for key, computing it at most once at a time"""
+        key = _scoped(key)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                return cached[1]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._compute(key, func, cacheable)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if call.error is None and (cacheable is None or cacheable(call.result)):
+                    self._cache[key] = (time.monotonic(), call.result)
+                    self._sweep()
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def _sweep(self):
+        """Drop expired results, at most once per TTL (keys that embed data versions never repeat)"""
+        now = time.monotonic()
+        if now - self._last_sweep < self.ttl:
+            return
+        self._last_sweep = now
+        for key in [key for key, (cached_at, _) in self._cache.items() if now - cached_at >= self.ttl]:
+            del self._cache[key]
+
+    def _compute(self, key, func, cacheable):
+        if not self.shared_dir:
+            return func()
+
+        path = os.path.join(self.shared_dir, _filename(key))
+        with FileLock(path + '.lock'):
+            try:
+                if time.time() - os.path.getmtime(path) < self.ttl:
+                    with open(path, 'rb') as f:
+                        return pickle.load(f)
+            except (OSError, pickle.PickleError, EOFError):
+                pass
+
+            result = func()
+            if cacheable is None or cacheable(result):
+                with open(path + '.tmp', 'wb') as f:
+                    pickle.dump(result, f)
+                os.replace(path + '.tmp', path)
+            return result
+
+    def invalidate(self, key=None):
+        """Drop cached results (all of them if no key is given)"""
+        if key is not None:
+            key = _scoped(key)
+        with self._lock:
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
+        if self.shared_dir:
+            names = [_filename(key)] if key is not None else [
+                name for name in os.listdir(self.shared_dir) if name.endswith('.pickle')
+            ]
+            for name in names:
+                try:
+                    os.remove(os.path.join(self.shared_dir, name))
+                except OSError:
+                    pass
+
+
+def _scoped(key):
+    tenant = current_tenant()
+    return f'{tenant}/{key}' if tenant else key
+
+
+def _filename(key):
+    return ''.join(c if c.isalnum() or c in '-_' else '_' for c in key) + '.pickle'
+
+
+analytics_flight = SingleFlight()
+
+
+def single_flight(name, cacheable=None):
+    """Decorator: coalesce calls to an analytics function by name and arguments"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = name
+            if args or kwargs:
+                key += ':' + ','.join([repr(a) for a in args] + [f'{k}={v!r}' for k, v in sorted(kwargs.items())])
+            return analytics_flight.do(key, lambda: func(*args, **kwargs), cacheable)
+        return wrapper
+    return decorator
+
+
+def init_single_flight(app):
+    """Configure result TTL and the optional cross-process cache directory"""
+    app.config.setdefault('ANALYTICS_CACHE_TTL', 5)
+    app.config.setdefault('ANALYTICS_SHARED_CACHE_DIR', None)
+    analytics_flight.configure(ttl=app.config['ANALYTICS_CACHE_TTL'],
+                               shared_dir=app.config['ANALYTICS_SHARED_CACHE_DIR'])
+    app.extensions['analytics_flight'] = analytics_flight
+    return analytics_flight
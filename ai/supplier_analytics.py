@@ -0,0 +1,105 @@
+"""
+Supplier performance analytics.
+
+One SQL statement computes every supplier's metrics in a single pass over
+purchases: LAG() over each supplier's purchases ordered by date gives the
+days between consecutive orders, and the grouped aggregates give volume,
+order frequency and product coverage, with a window over the aggregate for
+each supplier's share of all purchased units.
+
+Results are cached until the purchases, suppliers or products tables change:
+their data versions, read through the same session as the metrics, are part
+of the cache key, and create_purchase also drops the cached result of its
+own process straight away.
+"""
+from datetime import datetime
+
+from sqlalchemy import select
+
+from models.database import db, Product, Supplier, Purchase
+from models.data_versions import data_versions
+from models.read_routing import analytics_session
+from ai.singleflight import SingleFlight
+
+CACHE_TTL = 3600  # seconds; the data version key normally expires results sooner
+
+supplier_flight = SingleFlight(ttl=CACHE_TTL)
+
+
+def supplier_performance_rows(session=None):
+    """Per-supplier purchase metrics, largest volume first"""
+    session = session or analytics_session()
+    julianday = db.func.julianday
+
+    previous_date = db.func.lag(Purchase.purchase_date).over(
+        partition_by=Purchase.supplier_id, order_by=(Purchase.purchase_date, Purchase.purchase_id)
+    )
+    ordered = select(
+        Purchase.supplier_id, Purchase.product_id, Purchase.quantity_purchased, Purchase.purchase_date,
+        (julianday(Purchase.purchase_date) - julianday(previous_date)).label('days_between')
+    ).subquery()
+
+    quantity = db.func.coalesce(db.func.sum(ordered.c.quantity_purchased), 0)
+    purchase_count = db.func.count(ordered.c.supplier_id)
+    products_supplied = db.func.count(db.distinct(ordered.c.product_id))
+    first_purchase = db.func.min(ordered.c.purchase_date)
+    last_purchase = db.func.max(ordered.c.purchase_date)
+    total_products = select(db.func.count(Product.product_id)).scalar_subquery()
+
+    statement = select(
+        Supplier.supplier_id,
+        Supplier.supplier_name,
+        purchase_count.label('purchase_count'),
+        quantity.label('total_quantity'),
+        (quantity * 100.0 / db.func.nullif(db.func.sum(quantity).over(), 0)).label('volume_share'),
+        first_purchase.label('first_purchase'),
+        last_purchase.label('last_purchase'),
+        db.case((purchase_count > 1, purchase_count * 30.0 / (julianday(last_purchase) - julianday(first_purchase) + 1)),
+                else_=None).label('orders_per_30_days'),
+        db.func.avg(ordered.c.days_between).label('avg_days_between'),
+        db.func.max(ordered.c.days_between).label('max_days_between'),
+        (julianday(datetime.utcnow().date().isoformat()) - julianday(last_purchase)).label('days_since_last'),
+        products_supplied.label('products_supplied'),
+        (products_supplied * 100.0 / db.func.nullif(total_products, 0)).label('product_coverage'),
+    ).select_from(Supplier).outerjoin(
+        ordered, ordered.c.supplier_id == Supplier.supplier_id
+    ).group_by(Supplier.supplier_id, Supplier.supplier_name).order_by(quantity.desc(), Supplier.supplier_id)
+
+    rows = []
+    for row in session.execute(statement):
+        row = row._asdict()
+        for name, value in row.items():
+            if isinstance(value, float):
+                row[name] = round(value, 2)
+        rows.append(row)
+    return rows
+
+
+def _compute(session):
+    try:
+        return {
+            'success': True,
+            'suppliers': supplier_performance_rows(session),
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'suppliers': []
+        }
+
+
+def get_supplier_performance():
+    """Cached supplier metrics for the current purchases, suppliers and products"""
+    # Versions from the session the rows come from, so a lagging replica or
+    # snapshot can't cache old rows under the primary's newer versions
+    session = analytics_session()
+    versions = data_versions('purchases', 'suppliers', 'products', session=session)
+    key = 'supplier_performance:' + ','.join(f'{table}={version}' for table, version in sorted(versions.items()))
+    return supplier_flight.do(key, lambda: _compute(session), cacheable=lambda result: result['success'])
+
+
+def invalidate_supplier_performance():
+    """Forget cached metrics (called after a purchase is recorded)"""
+    supplier_flight.invalidate()
@@ -1,21 +1,67 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, Response, stream_with_context, g, abort
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from datetime import datetime
 import os
 import sys
 
+import click
+
 # Add models directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'models'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'ai'))
 
-from models.database import db, Product, Supplier, Inventory, Sale, Purchase, User, ActivityLog, init_db
-from ai.predictor import predict_low_stock, get_sales_trend_data, get_category_sales
-
-app = Flask(__name__)
+from models.database import db, Product, Supplier, Inventory, Sale, Purchase, User, ActivityLog, Location, Alert, init_db
+from models.locations import resolve_location, adjust_stock, transfer_stock, stock_by_location
+from models.ledger import stock_on_date, snapshot_all, reconcile
+from models.queries import product_rows, supplier_rows, inventory_rows, sale_rows, purchase_rows
+from models.sales_partitions import (archive_sales, archived_years, hot_start, total_quantity_sold, year_bounds,
+                                     find_archived_sale, delete_archived_sales)
+from models.read_routing import init_read_routing, analytics_session
+from models.stock_index import stock_index, init_stock_index
+from models.data_versions import init_data_versions
+from ai.predictor import predict_low_stock, get_sales_trend_data, get_category_sales, FORECAST_MODELS
+from ai.backtest import run_backtest
+from ai.supplier_analytics import get_supplier_performance, invalidate_supplier_performance
+from ai.classification import get_product_classes, refresh_product_classes
+from ai.sales_snapshot import init_sales_snapshot
+from ai.singleflight import init_single_flight
+from services.events import event_bus
+from services.alerts import init_alerts, evaluate_product, evaluate_all
+from services.json_provider import init_json
+from services.compression import init_compression
+from services.profiling import init_profiling
+from services.assets import init_assets, build_assets
+from services.fragment_cache import init_fragment_cache, deferred
+from models.tenancy import init_tenancy, provision_tenant, ensure_tenant, migrate_all, tenant_key, tenant_engines
+
+# INVENTORY_INSTANCE_PATH keeps the database and other instance files elsewhere (the tests use it)
+app = Flask(__name__, instance_path=os.environ.get('INVENTORY_INSTANCE_PATH'))
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///inventory.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = 'your-secret-key-here-change-in-production'
 
+# Analytics reads: 'readonly' (mode=ro connections), 'snapshot' or 'primary'
+app.config['ANALYTICS_READ_MODE'] = 'readonly'
+app.config['ANALYTICS_MAX_STALENESS'] = 60  # seconds, snapshot mode only
+app.config['ANALYTICS_CACHE_TTL'] = 5  # seconds analytics results are shared
+app.config['ANALYTICS_SHARED_CACHE_DIR'] = None  # set to share across worker processes
+
+# Responses: orjson serialization, gzip/brotli above this many bytes
+app.config['COMPRESS_MIN_SIZE'] = 1024
+init_json(app)
+init_compression(app)
+
+# Profiling: off unless enabled; profiles go to instance/profiles
+app.config['PROFILE_ENABLED'] = os.environ.get('PROFILE_ENABLED') == '1'
+app.config['PROFILE_SAMPLE_RATE'] = 0.01  # fraction of matching requests profiled
+app.config['PROFILE_ROUTES'] = ['/api/predict', 'inventory']  # endpoints or path prefixes; [] for all
+app.config['PROFILE_MODE'] = 'cprofile'  # or 'sample' for collapsed stacks
+app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN')  # send as X-Profile to force a profile
+init_profiling(app)
+
+# Static files: fingerprinted builds from `flask build-assets` are cached for a year
+init_assets(app)
+
 # Initialize Flask-Login
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -26,8 +72,19 @@ login_manager.login_message = 'Please log in to access this page.'
 def load_user(user_id):
     return User.query.get(int(user_id))
 
+# Tenancy: one SQLite database per company under instance/tenants (`flask tenants ...`)
+app.config['TENANCY_ENABLED'] = os.environ.get('TENANCY_ENABLED') == '1'
+
 # Initialize database
 init_db(app)
+init_tenancy(app)
+init_read_routing(app)
+init_sales_snapshot(app)
+init_single_flight(app)
+init_stock_index(app)
+init_data_versions(app)
+init_fragment_cache(app)
+init_alerts(app)
 
 # Helper function to log activities
 def log_activity(action_type, affected_table, affected_id=None, description=None):
@@ -43,6 +100,31 @@ def log_activity(action_type, affected_table, affected_id=None, description=None
         db.session.add(activity)
         db.session.commit()
 
+# Helper function to propagate committed stock changes
+def stock_changed(inventory):
+    """Update in-process stock state after an inventory row was committed"""
+    # No reload here: it could already pick up this commit and hide the transition
+    was_low = stock_index.is_low(inventory.product_id, refresh=False)
+    stock_index.update(inventory.product_id, inventory.stock_quantity, inventory.low_stock_threshold)
+    is_low = inventory.stock_quantity < inventory.low_stock_threshold
+    
+    event_bus.publish('stock', {
+        'product_id': inventory.product_id,
+        'inventory_id': inventory.inventory_id,
+        'stock_quantity': inventory.stock_quantity,
+        'low_stock_threshold': inventory.low_stock_threshold,
+        'is_low': is_low,
+        'low_stock_count': stock_index.low_stock_count()
+    })
+    if is_low and not was_low:
+        event_bus.publish('low_stock', {
+            'product_id': inventory.product_id,
+            'product_name': inventory.product.product_name if inventory.product else None,
+            'stock_quantity': inventory.stock_quantity,
+            'low_stock_threshold': inventory.low_stock_threshold
+        })
+    evaluate_product(inventory)
+
 # ============= AUTHENTICATION ROUTES =============
 @app.route('/')
 def home():
@@ -85,6 +167,7 @@ def register():
         email = request.form.get('email')
         password = request.form.get('password')
         confirm_password = request.form.get('confirm_password')
+        company_name = (request.form.get('company_name') or '').strip() or None
         
         # Validation
         if password != confirm_password:
@@ -102,10 +185,14 @@ def register():
         # Create new user
         new_user = User(
             username=username,
-            email=email
+            email=email,
+            company_name=company_name
         )
         new_user.set_password(password)
         
+        if company_name and app.config['TENANCY_ENABLED']:
+            ensure_tenant(company_name)
+        
         db.session.add(new_user)
         db.session.commit()
         
@@ -124,23 +211,32 @@ def logout():
     return redirect(url_for('home'))
 
 # ============= DASHBOARD (LOGGED IN HOME) =============
+def low_stock_rows(limit=5):
+    """(Inventory, Product) rows of the most urgent low-stock items"""
+    low_stock_ids = stock_index.low_stock(limit=limit)
+    rows = db.session.query(Inventory, Product).join(
+        Product, Inventory.product_id == Product.product_id
+    ).filter(Inventory.product_id.in_(low_stock_ids)).all()
+    return sorted(rows, key=lambda row: low_stock_ids.index(row[1].product_id))
+
 @app.route('/dashboard')
 @login_required
 def dashboard():
     """Personalized dashboard for logged-in users"""
     try:
-        total_products = Product.query.count()
-        total_sales = db.session.query(db.func.sum(Sale.quantity_sold)).scalar() or 0
-        low_stock_count = Inventory.query.filter(Inventory.stock_quantity < 20).count()
-        total_suppliers = Supplier.query.count()
+        # Summary figures are analytics reads and go to the read-only engine.
+        # They are deferred: cached fragments of the page don't run them at all
+        reader = analytics_session()
+        total_products = deferred(lambda: reader.query(Product).count())
+        total_sales = deferred(lambda: total_quantity_sold(reader))
+        low_stock_count = stock_index.low_stock_count()
+        total_suppliers = deferred(lambda: reader.query(Supplier).count())
         
         # Get recent sales
-        recent_sales = Sale.query.order_by(Sale.sale_date.desc()).limit(5).all()
+        recent_sales = deferred(lambda: reader.query(Sale).order_by(Sale.sale_date.desc()).limit(5).all())
         
-        # Get low stock items
-        low_stock_items = db.session.query(Inventory, Product).join(
-            Product, Inventory.product_id == Product.product_id
-        ).filter(Inventory.stock_quantity < 20).limit(5).all()
+        # Get low stock items, most urgent first
+        low_stock_items = deferred(low_stock_rows)
         
         # Get user's recent activity
         recent_activities = ActivityLog.query.filter_by(
@@ -187,14 +283,13 @@ def get_all_activity_logs():
 @login_required
 def products():
     """Products management page"""
-    products = Product.query.all()
+    products = deferred(lambda: Product.query.all())
     return render_template('products.html', products=products)
 
 @app.route('/api/products', methods=['GET'])
 def get_products():
     """Get all products (API)"""
-    products = Product.query.all()
-    return jsonify([p.to_dict() for p in products])
+    return jsonify(product_rows())
 
 @app.route('/api/products/<int:product_id>', methods=['GET'])
 def get_product(product_id):
@@ -219,11 +314,15 @@ def create_product():
         # Also create inventory entry for new product
         inventory = Inventory(
             product_id=product.product_id,
-            stock_quantity=data.get('initial_stock', 0),
-            restock_date=datetime.now()
+            stock_quantity=0,
+            restock_date=datetime.now(),
+            low_stock_threshold=int(data.get('low_stock_threshold', 20))
         )
         db.session.add(inventory)
+        adjust_stock(inventory, resolve_location(data.get('location_id')), int(data.get('initial_stock', 0)),
+                     reason='opening', reference=product)
         db.session.commit()
+        stock_changed(inventory)
         
         # Log activity
         log_activity('add_product', 'products', product.product_id, f"Added product '{product.product_name}'")
@@ -262,8 +361,11 @@ def delete_product(product_id):
     try:
         product = Product.query.get_or_404(product_id)
         product_name = product.product_name
+        # The cascade only reaches the hot sales table
+        delete_archived_sales(lambda table: table.c.product_id == product_id)
         db.session.delete(product)
         db.session.commit()
+        stock_index.remove(product_id)
         
         # Log activity
         log_activity('delete_product', 'products', product_id, f"Deleted product '{product_name}'")
@@ -284,8 +386,14 @@ def suppliers():
 @app.route('/api/suppliers', methods=['GET'])
 def get_suppliers():
     """Get all suppliers (API)"""
-    suppliers = Supplier.query.all()
-    return jsonify([s.to_dict() for s in suppliers])
+    return jsonify(supplier_rows())
+
+@app.route('/api/suppliers/analytics', methods=['GET'])
+@login_required
+def supplier_analytics():
+    """Per-supplier volume, order frequency, intervals and product coverage"""
+    result = get_supplier_performance()
+    return jsonify(result)
 
 @app.route('/api/suppliers/<int:supplier_id>', methods=['GET'])
 def get_supplier(supplier_id):
@@ -358,8 +466,7 @@ def inventory():
 @app.route('/api/inventory', methods=['GET'])
 def get_inventory():
     """Get all inventory items (API)"""
-    inventory_items = Inventory.query.all()
-    return jsonify([i.to_dict() for i in inventory_items])
+    return jsonify(inventory_rows())
 
 @app.route('/api/inventory/<int:inventory_id>', methods=['PUT'])
 @login_required
@@ -370,11 +477,18 @@ def update_inventory(inventory_id):
         data = request.get_json()
         
         old_quantity = inventory.stock_quantity
-        inventory.stock_quantity = int(data.get('stock_quantity', inventory.stock_quantity))
+        # A new total is applied as a correction at one location (default if not given)
+        new_quantity = int(data.get('stock_quantity', inventory.stock_quantity))
+        if new_quantity != old_quantity:
+            adjust_stock(inventory, resolve_location(data.get('location_id')), new_quantity - old_quantity,
+                         reason='adjustment', reference=inventory)
         if 'restock_date' in data and data['restock_date']:
             inventory.restock_date = datetime.strptime(data['restock_date'], '%Y-%m-%d')
+        if 'low_stock_threshold' in data:
+            inventory.low_stock_threshold = int(data['low_stock_threshold'])
         
         db.session.commit()
+        stock_changed(inventory)
         log_activity('edit_inventory', 'inventory', inventory_id, 
                     f"Updated stock for '{inventory.product.product_name}' from {old_quantity} to {inventory.stock_quantity}")
         return jsonify({'success': True, 'inventory': inventory.to_dict()})
@@ -382,20 +496,114 @@ def update_inventory(inventory_id):
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 400
 
+@app.route('/api/inventory/transfer', methods=['POST'])
+@login_required
+def create_transfer():
+    """Move stock between locations (API)"""
+    try:
+        data = request.get_json()
+        product_id = int(data['product_id'])
+        quantity = int(data['quantity'])
+        from_location = resolve_location(data['from_location_id'])
+        to_location = resolve_location(data['to_location_id'])
+        
+        source, destination = transfer_stock(product_id, from_location, to_location, quantity)
+        db.session.commit()
+        log_activity('stock_transfer', 'location_stock', product_id,
+                    f"Transferred {quantity} units of '{source.product.product_name}' from "
+                    f"{from_location.location_name} to {to_location.location_name}")
+        return jsonify({'success': True, 'from': source.to_dict(), 'to': destination.to_dict()})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/inventory/as-of', methods=['GET'])
+def get_inventory_as_of():
+    """Historical stock per product at the end of a date, from the ledger (API)"""
+    try:
+        day = datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+        product_id = request.args.get('product_id', type=int)
+        totals = stock_on_date(day, product_id=product_id, session=analytics_session())
+        return jsonify({
+            'success': True,
+            'date': day.strftime('%Y-%m-%d'),
+            'stock': [{'product_id': pid, 'stock_quantity': quantity} for pid, quantity in sorted(totals.items())]
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/inventory/reconcile', methods=['GET'])
+@login_required
+def reconcile_inventory():
+    """Check inventory and location stock against the ledger (admin only)"""
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'Admin access required'}), 403
+    mismatches = reconcile()
+    return jsonify({'success': not mismatches, 'mismatches': mismatches})
+
+@app.route('/api/products/<int:product_id>/stock', methods=['GET'])
+def get_product_stock(product_id):
+    """Stock of one product at every location (API)"""
+    Product.query.get_or_404(product_id)
+    return jsonify([row.to_dict() for row in stock_by_location(product_id)])
+
+# ============= LOCATIONS ROUTES =============
+@app.route('/api/locations', methods=['GET'])
+def get_locations():
+    """Get all locations (API)"""
+    locations = Location.query.order_by(Location.location_id).all()
+    return jsonify([l.to_dict() for l in locations])
+
+@app.route('/api/locations', methods=['POST'])
+@login_required
+def create_location():
+    """Create new location (API)"""
+    try:
+        data = request.get_json()
+        location = Location(
+            location_name=data['location_name'],
+            address=data.get('address')
+        )
+        db.session.add(location)
+        db.session.commit()
+        log_activity('add_location', 'locations', location.location_id, f"Added location '{location.location_name}'")
+        return jsonify({'success': True, 'location': location.to_dict()}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/locations/<int:location_id>/stock', methods=['GET'])
+def get_location_stock(location_id):
+    """Stock held at one location (API)"""
+    location = Location.query.get_or_404(location_id)
+    return jsonify([row.to_dict() for row in location.stock])
+
 # ============= SALES ROUTES =============
 @app.route('/sales')
 @login_required
 def sales():
-    """Sales management page"""
-    sales_records = Sale.query.order_by(Sale.sale_date.desc()).all()
+    """Sales management page (?year= shows an archived year)"""
+    years = archived_years()
+    year = request.args.get('year', type=int)
+    if year in years:
+        start, end = year_bounds(year)
+    else:
+        # Only the hot partition: sales after the last archived year
+        year, start, end = None, hot_start(), None
+    sales_records = sale_rows(start=start, end=end, newest_first=True)
     products = Product.query.all()
-    return render_template('sales.html', sales=sales_records, products=products)
+    return render_template('sales.html', sales=sales_records, products=products,
+                           archived_years=years, year=year)
 
 @app.route('/api/sales', methods=['GET'])
 def get_sales():
-    """Get all sales (API)"""
-    sales = Sale.query.all()
-    return jsonify([s.to_dict() for s in sales])
+    """Get all sales, or those dated in [start, end) with ?start=&end=YYYY-MM-DD (API)"""
+    try:
+        start, end = [datetime.strptime(request.args[name], '%Y-%m-%d').date() if name in request.args else None
+                      for name in ('start', 'end')]
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify(sale_rows(start=start, end=end))
 
 @app.route('/api/sales', methods=['POST'])
 @login_required
@@ -415,18 +623,22 @@ def create_sale():
             return jsonify({'success': False, 'error': f'Insufficient stock. Available: {inventory.stock_quantity}'}), 400
         
         # Create sale record
+        location = resolve_location(data.get('location_id'))
         sale_date = datetime.strptime(data['sale_date'], '%Y-%m-%d') if 'sale_date' in data else datetime.now()
         sale = Sale(
             product_id=product_id,
             quantity_sold=quantity_sold,
-            sale_date=sale_date
+            sale_date=sale_date,
+            location_id=location.location_id
         )
         db.session.add(sale)
         
-        # Update inventory
-        inventory.stock_quantity -= quantity_sold
+        # Update inventory at the selling location and the product total
+        adjust_stock(inventory, location, -quantity_sold, reason='sale', reference=sale)
         
         db.session.commit()
+        stock_changed(inventory)
+        event_bus.publish('sale', sale.to_dict())
         log_activity('sale_recorded', 'sales', sale.sale_id, 
                     f"Recorded sale of {quantity_sold} units of '{inventory.product.product_name}'")
         return jsonify({'success': True, 'sale': sale.to_dict()}), 201
@@ -438,30 +650,92 @@ def create_sale():
 @login_required
 def delete_sale(sale_id):
     """Delete sale (API)"""
+    sale = db.session.get(Sale, sale_id)
+    # Sales of archived years are rows of their year's archive table
+    archived = find_archived_sale(sale_id) if sale is None else None
+    if sale is None and archived is None:
+        abort(404)
+    row = sale if sale is not None else archived
     try:
-        sale = Sale.query.get_or_404(sale_id)
-        product_name = sale.product.product_name
-        quantity = sale.quantity_sold
+        product_name = db.session.get(Product, row.product_id).product_name
+        quantity = row.quantity_sold
         
-        # Restore inventory
-        inventory = Inventory.query.filter_by(product_id=sale.product_id).first()
+        # Restore inventory where the sale was made
+        inventory = Inventory.query.filter_by(product_id=row.product_id).first()
         if inventory:
-            inventory.stock_quantity += sale.quantity_sold
+            adjust_stock(inventory, resolve_location(row.location_id), quantity,
+                         reason='sale_deleted', reference=sale if sale is not None else (Sale.__tablename__, sale_id))
         
-        db.session.delete(sale)
+        if sale is not None:
+            db.session.delete(sale)
+        else:
+            delete_archived_sales(lambda table: table.c.sale_id == sale_id)
         db.session.commit()
+        if inventory:
+            stock_changed(inventory)
+        event_bus.publish('sale_deleted', {'sale_id': sale_id, 'quantity_sold': quantity})
         log_activity('delete_sale', 'sales', sale_id, f"Deleted sale of {quantity} units of '{product_name}'")
         return jsonify({'success': True, 'message': 'Sale deleted and inventory restored'})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 400
 
+# ============= ALERT ROUTES =============
+@app.route('/api/alerts', methods=['GET'])
+@login_required
+def get_alerts():
+    """Stock alerts, newest first (API, paginated)"""
+    status = request.args.get('status', 'active')
+    query = db.select(Alert).order_by(Alert.updated_at.desc(), Alert.alert_id.desc())
+    if status != 'all':
+        query = query.where(Alert.status == status)
+    if request.args.get('product_id'):
+        query = query.where(Alert.product_id == request.args.get('product_id', type=int))
+    if request.args.get('rule'):
+        query = query.where(Alert.rule == request.args['rule'])
+    if request.args.get('severity'):
+        query = query.where(Alert.severity == request.args['severity'])
+    
+    page = db.paginate(query, page=request.args.get('page', 1, type=int),
+                       per_page=request.args.get('per_page', 50, type=int), max_per_page=200, error_out=False)
+    return jsonify({
+        'success': True,
+        'alerts': [alert.to_dict() for alert in page.items],
+        'page': page.page,
+        'per_page': page.per_page,
+        'total': page.total,
+        'pages': page.pages
+    })
+
+# ============= LIVE UPDATES =============
+@app.route('/api/stream')
+@login_required
+def stream():
+    """Server-Sent Events stream of stock, sale and low-stock deltas"""
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    subscription = event_bus.subscribe(last_event_id)
+    
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                event = subscription.get(timeout=15)
+                if event is None:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                else:
+                    yield event.encode()
+        finally:
+            event_bus.unsubscribe(subscription)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 # ============= PURCHASES ROUTES =============
 @app.route('/api/purchases', methods=['GET'])
 def get_purchases():
     """Get all purchases (API)"""
-    purchases = Purchase.query.all()
-    return jsonify([p.to_dict() for p in purchases])
+    return jsonify(purchase_rows())
 
 @app.route('/api/purchases', methods=['POST'])
 @login_required
@@ -473,22 +747,27 @@ def create_purchase():
         quantity_purchased = int(data['quantity_purchased'])
         
         # Create purchase record
+        location = resolve_location(data.get('location_id'))
         purchase_date = datetime.strptime(data['purchase_date'], '%Y-%m-%d') if 'purchase_date' in data else datetime.now()
         purchase = Purchase(
             product_id=product_id,
             supplier_id=int(data['supplier_id']),
             quantity_purchased=quantity_purchased,
-            purchase_date=purchase_date
+            purchase_date=purchase_date,
+            location_id=location.location_id
         )
         db.session.add(purchase)
         
-        # Update inventory
+        # Update inventory at the receiving location and the product total
         inventory = Inventory.query.filter_by(product_id=product_id).first()
         if inventory:
-            inventory.stock_quantity += quantity_purchased
+            adjust_stock(inventory, location, quantity_purchased, reason='purchase', reference=purchase)
             inventory.restock_date = purchase_date
         
         db.session.commit()
+        invalidate_supplier_performance()
+        if inventory:
+            stock_changed(inventory)
         log_activity('purchase_recorded', 'purchases', purchase.purchase_id, 
                     f"Recorded purchase of {quantity_purchased} units of '{purchase.product.product_name}'")
         return jsonify({'success': True, 'purchase': purchase.to_dict()}), 201
@@ -505,8 +784,12 @@ def ai_insights():
 
 @app.route('/api/predict', methods=['GET'])
 def predict():
-    """AI prediction endpoint"""
-    result = predict_low_stock()
+    """AI prediction endpoint (?model=linear|holt_winters|croston)"""
+    model = request.args.get('model', 'linear')
+    if model not in FORECAST_MODELS:
+        return jsonify({'success': False, 'error': f'Unknown model: {model}',
+                        'models': list(FORECAST_MODELS)}), 400
+    result = predict_low_stock(model)
     return jsonify(result)
 
 @app.route('/api/sales-trend', methods=['GET'])
@@ -521,6 +804,120 @@ def category_sales():
     result = get_category_sales()
     return jsonify(result)
 
+@app.route('/api/products/classification', methods=['GET'])
+@login_required
+def product_classification():
+    """ABC (revenue) and XYZ (demand variability) class of every product"""
+    try:
+        classes = get_product_classes()
+        names = dict(analytics_session().query(Product.product_id, Product.product_name))
+        products = [dict(product_id=product_id, product_name=names.get(product_id), **product_class)
+                    for product_id, product_class in classes.items()]
+        products.sort(key=lambda p: -p['revenue'])
+        return jsonify({'success': True, 'products': products})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+# ============= MAINTENANCE COMMANDS =============
+@app.cli.command('snapshot-stock')
+def snapshot_stock_command():
+    """Snapshot every product's ledger total (run periodically)"""
+    print(f'Took {snapshot_all()} stock snapshots')
+
+@app.cli.command('reconcile-stock')
+def reconcile_stock_command():
+    """Report inventory rows that disagree with the stock ledger"""
+    mismatches = reconcile()
+    for mismatch in mismatches:
+        print(f"{mismatch['table']}: product {mismatch['product_id']} location {mismatch['location_id']} "
+              f"ledger={mismatch['ledger']} recorded={mismatch['recorded']}")
+    print('Stock ledger reconciled' if not mismatches else f'{len(mismatches)} mismatches found')
+    if mismatches:
+        sys.exit(1)
+
+@app.cli.command('backtest')
+@click.option('--horizon', default=7, help='Days forecast at each origin')
+@click.option('--step', default=7, help='Days between forecast origins')
+@click.option('--min-history', default=14, help='Days of history before the first origin')
+@click.option('--days', type=int, default=None, help='Only use the last N days of sales')
+@click.option('--model', 'models', multiple=True, help='Model to evaluate (repeatable, default all)')
+def backtest_command(horizon, step, min_history, days, models):
+    """Rolling-origin backtest of the stock forecasting models"""
+    results = run_backtest(models=list(models) or None, horizon=horizon, step=step,
+                           min_history=min_history, days=days)
+    print(f"{'model':<18}{'origins':>8}{'MAPE %':>9}{'MASE':>8}{'SO prec':>9}{'SO rec':>8}"
+          f"{'wall ms':>10}{'CPU ms':>9}{'peak KB':>10}")
+    for r in results:
+        cells = [r['mape'], r['mase'], r['stockout_precision'], r['stockout_recall']]
+        mape, mase, precision, recall = ['-' if c is None else c for c in cells]
+        print(f"{r['model']:<18}{r['origins']:>8}{mape:>9}{mase:>8}{precision:>9}{recall:>8}"
+              f"{r['wall_ms']:>10}{r['cpu_ms']:>9}{r['peak_kb']:>10}")
+
+@app.cli.command('classify-products')
+def classify_products_command():
+    """Recompute ABC/XYZ classes that set how often forecasts refresh"""
+    classes = refresh_product_classes()
+    counts = {}
+    for product_class in classes.values():
+        key = product_class['abc'] + product_class['xyz']
+        counts[key] = counts.get(key, 0) + 1
+    for key in sorted(counts):
+        print(f'{key}: {counts[key]} products')
+    print(f'{len(classes)} products classified')
+
+@app.cli.command('archive-sales')
+@click.option('--before', 'before_year', type=int, default=None, help='Archive years before this one (default: this year)')
+@click.option('--tenant', default=None, help='Company whose tenant database to archive')
+def archive_sales_command(before_year, tenant):
+    """Move closed years of sales to yearly archive tables"""
+    if tenant:
+        if not app.config['TENANCY_ENABLED']:
+            raise click.UsageError('--tenant needs TENANCY_ENABLED=1')
+        g.tenant = tenant_key(tenant)
+    for partition in archive_sales(before_year):
+        print(f'{partition.table_name}: {partition.row_count} sales, {partition.total_quantity} units')
+    print(f"Archived years: {', '.join(map(str, archived_years())) or 'none'}")
+
+@app.cli.command('evaluate-alerts')
+def evaluate_alerts_command():
+    """Evaluate alert rules for every product (backfill)"""
+    print(f'{len(evaluate_all())} alerts raised or changed')
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Minify and fingerprint static CSS/JS into static/dist"""
+    manifest = build_assets(app.static_folder, app.config['ASSETS_DIST'])
+    app.extensions['assets'].clear()
+    app.extensions['assets'].update(manifest)
+    for source_name, built_name in sorted(manifest.items()):
+        print(f'{source_name} -> {built_name}')
+
+@app.cli.group('tenants')
+def tenants_command():
+    """Manage per-company tenant databases"""
+
+@tenants_command.command('provision')
+@click.argument('company_name')
+def provision_tenant_command(company_name):
+    """Create (or upgrade) a company's database"""
+    tenant = provision_tenant(company_name)
+    print(f'Provisioned {tenant} at {tenant_engines.path(tenant)}')
+
+@tenants_command.command('migrate')
+def migrate_tenants_command():
+    """Bring every tenant database up to the current schema"""
+    tenants = migrate_all()
+    print(f'Migrated {len(tenants)} tenant databases')
+
+@tenants_command.command('list')
+def list_tenants_command():
+    """List provisioned tenants and their users"""
+    users = {}
+    for user in User.query.filter(User.company_name.isnot(None)):
+        users.setdefault(tenant_key(user.company_name), []).append(user.username)
+    for tenant in tenant_engines.tenants():
+        print(f"{tenant}: {', '.join(sorted(users.get(tenant, []))) or '(no users)'}")
+
 # ============= ERROR HANDLERS =============
 @app.errorhandler(404)
 def not_found(e):
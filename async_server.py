@@ -0,0 +1,221 @@
+"""
+Asyncio serving mode for the read-only list and analytics endpoints.
+
+The Flask app in app.py keeps every page and write route. This server answers
+the same GET endpoints from one event loop so a slow /api/predict call no
+longer pins a WSGI worker thread:
+
+    python async_server.py --port 5001
+
+List endpoints query SQLite through a bounded pool of read-only aiosqlite
+connections. The chart endpoints and /api/predict call ai/predictor.py
+unchanged inside a thread pool with the Flask app context, so both servers
+share the same models, sales snapshot, caches and database.
+
+Only the primary database is served: the server refuses to start when the
+Flask app has TENANCY_ENABLED.
+"""
+import argparse
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import aiosqlite
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'models'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'ai'))
+
+from app import app as flask_app
+from models.database import db
+from models.sales_partitions import archive_name, routed_years
+from ai.predictor import predict_low_stock, get_sales_trend_data, get_category_sales, FORECAST_MODELS
+
+
+class SQLitePool:
+    """Bounded pool of read-only aiosqlite connections"""
+
+    def __init__(self, database, size=8):
+        self.database = database
+        self.size = size
+        self._idle = asyncio.LifoQueue()
+        self._slots = asyncio.Semaphore(size)
+        self._connections = []
+
+    async def _connect(self):
+        conn = await aiosqlite.connect(f'file:{self.database}?mode=ro', uri=True)
+        conn.row_factory = aiosqlite.Row
+        self._connections.append(conn)
+        return conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a connection, opening one lazily up to the pool size"""
+        async with self._slots:
+            conn = self._idle.get_nowait() if not self._idle.empty() else await self._connect()
+            try:
+                yield conn
+            finally:
+                self._idle.put_nowait(conn)
+
+    async def fetchall(self, sql, params=()):
+        async with self.acquire() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return await cursor.fetchall()
+
+    async def close(self):
+        for conn in self._connections:
+            await conn.close()
+        self._connections.clear()
+
+
+def database_path():
+    """Resolve the SQLite file the Flask app is configured to use"""
+    with flask_app.app_context():
+        return db.engine.url.database
+
+
+def run_in_app_context(func, *args):
+    """Call a Flask-SQLAlchemy based function from an executor thread"""
+    with flask_app.app_context():
+        return func(*args)
+
+
+# ============= LIST ENDPOINTS =============
+async def get_products(request):
+    rows = await request.app['pool'].fetchall(
+        'SELECT product_id, product_name, category, price FROM products ORDER BY product_id'
+    )
+    return web.json_response([dict(row) for row in rows])
+
+
+async def get_suppliers(request):
+    rows = await request.app['pool'].fetchall(
+        'SELECT supplier_id, supplier_name, contact_info FROM suppliers ORDER BY supplier_id'
+    )
+    return web.json_response([dict(row) for row in rows])
+
+
+async def get_inventory(request):
+    rows = await request.app['pool'].fetchall(
+        'SELECT i.inventory_id, i.product_id, p.product_name, i.stock_quantity, i.restock_date, '
+        'i.low_stock_threshold '
+        'FROM inventory i LEFT JOIN products p ON p.product_id = i.product_id '
+        'ORDER BY i.inventory_id'
+    )
+    return web.json_response([dict(row) for row in rows])
+
+
+async def sales_source(pool, start=None, end=None):
+    """FROM clause for sales dated in [start, end): the hot table plus overlapping archives"""
+    years = [row[0] for row in await pool.fetchall('SELECT year FROM sales_partitions')]
+    tables = ['sales'] + [archive_name(year) for year in routed_years(years, start, end)]
+    columns = 'sale_id, product_id, quantity_sold, sale_date, location_id'
+    return '(' + ' UNION ALL '.join(f'SELECT {columns} FROM {table}' for table in tables) + ')'
+
+
+async def get_sales(request):
+    try:
+        start, end = [datetime.strptime(request.query[name], '%Y-%m-%d').date() if name in request.query else None
+                      for name in ('start', 'end')]
+    except ValueError as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=400)
+    pool = request.app['pool']
+    rows = await pool.fetchall(
+        'SELECT s.sale_id, s.product_id, p.product_name, s.quantity_sold, s.sale_date, s.location_id '
+        f'FROM {await sales_source(pool, start, end)} s LEFT JOIN products p ON p.product_id = s.product_id '
+        'WHERE (? IS NULL OR s.sale_date >= ?) AND (? IS NULL OR s.sale_date < ?) '
+        'ORDER BY s.sale_id',
+        (start and start.isoformat(),) * 2 + (end and end.isoformat(),) * 2
+    )
+    return web.json_response([dict(row) for row in rows])
+
+
+async def get_purchases(request):
+    rows = await request.app['pool'].fetchall(
+        'SELECT pu.purchase_id, pu.product_id, p.product_name, pu.supplier_id, s.supplier_name, '
+        'pu.quantity_purchased, pu.purchase_date, pu.location_id '
+        'FROM purchases pu '
+        'LEFT JOIN products p ON p.product_id = pu.product_id '
+        'LEFT JOIN suppliers s ON s.supplier_id = pu.supplier_id '
+        'ORDER BY pu.purchase_id'
+    )
+    return web.json_response([dict(row) for row in rows])
+
+
+# ============= ANALYTICS ENDPOINTS =============
+async def run_analytics(request, func, *args):
+    """Run a shared ai.predictor function off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(request.app['executor'], run_in_app_context, func, *args)
+
+
+async def sales_trend(request):
+    """ai.predictor.get_sales_trend_data, as served by app.py"""
+    return web.json_response(await run_analytics(request, get_sales_trend_data))
+
+
+async def category_sales(request):
+    """ai.predictor.get_category_sales, as served by app.py"""
+    return web.json_response(await run_analytics(request, get_category_sales))
+
+
+async def predict(request):
+    """Run the stock forecaster off the event loop"""
+    model = request.query.get('model', 'linear')
+    if model not in FORECAST_MODELS:
+        return web.json_response({'success': False, 'error': f'Unknown model: {model}',
+                                  'models': list(FORECAST_MODELS)}, status=400)
+    return web.json_response(await run_analytics(request, predict_low_stock, model))
+
+
+# ============= APPLICATION =============
+def create_app(database=None, pool_size=8, forecast_workers=2):
+    """Build the aiohttp application serving the read-only endpoints"""
+    if flask_app.config['TENANCY_ENABLED']:
+        raise RuntimeError('async_server.py only serves the primary database; unset TENANCY_ENABLED')
+    app = web.Application()
+    app['database'] = database or database_path()
+    app['pool_size'] = pool_size
+    app['forecast_workers'] = forecast_workers
+
+    async def on_startup(app):
+        app['pool'] = SQLitePool(app['database'], size=app['pool_size'])
+        app['executor'] = ThreadPoolExecutor(max_workers=app['forecast_workers'],
+                                             thread_name_prefix='forecast')
+
+    async def on_cleanup(app):
+        await app['pool'].close()
+        app['executor'].shutdown(wait=False)
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+
+    app.router.add_get('/api/products', get_products)
+    app.router.add_get('/api/suppliers', get_suppliers)
+    app.router.add_get('/api/inventory', get_inventory)
+    app.router.add_get('/api/sales', get_sales)
+    app.router.add_get('/api/purchases', get_purchases)
+    app.router.add_get('/api/sales-trend', sales_trend)
+    app.router.add_get('/api/category-sales', category_sales)
+    app.router.add_get('/api/predict', predict)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Async read-path server for the inventory API')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--pool-size', type=int, default=8, help='max open SQLite connections')
+    parser.add_argument('--forecast-workers', type=int, default=2, help='threads for /api/predict and the chart endpoints')
+    args = parser.parse_args()
+
+    web.run_app(create_app(pool_size=args.pool_size, forecast_workers=args.forecast_workers),
+                host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark the async read-path server against the threaded WSGI baseline.
+
+Starts both servers as subprocesses on the same database, fires concurrent
+GET requests at each and prints throughput and latency percentiles:
+
+    python benchmarks/bench_async.py --concurrency 64 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WSGI_SERVER = (
+    "import sys; sys.path.insert(0, {root!r});"
+    "from werkzeug.serving import make_server; from app import app;"
+    "make_server('127.0.0.1', {port}, app, threaded=True).serve_forever()"
+)
+
+ENDPOINTS = ['/api/products', '/api/inventory', '/api/sales', '/api/sales-trend',
+             '/api/category-sales', '/api/predict']
+
+
+def start_server(kind, port):
+    if kind == 'wsgi':
+        cmd = [sys.executable, '-c', WSGI_SERVER.format(root=ROOT, port=port)]
+    else:
+        cmd = [sys.executable, os.path.join(ROOT, 'async_server.py'), '--host', '127.0.0.1',
+               '--port', str(port)]
+    return subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_until_ready(session, base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(base_url + '/api/products') as resp:
+                if resp.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f'server at {base_url} did not start')
+
+
+async def run_load(base_url, endpoint, total, concurrency):
+    latencies = []
+    counter = iter(range(total))
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await wait_until_ready(session, base_url)
+
+        async def worker():
+            for _ in counter:
+                start = time.perf_counter()
+                async with session.get(base_url + endpoint) as resp:
+                    await resp.read()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'rps': total / elapsed,
+        'p50': latencies[len(latencies) // 2] * 1000,
+        'p95': latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--endpoint', action='append', help='endpoint(s) to test (default: all)')
+    args = parser.parse_args()
+
+    endpoints = args.endpoint or ENDPOINTS
+    servers = {'wsgi': 5101, 'async': 5102}
+    processes = [start_server(kind, port) for kind, port in servers.items()]
+    try:
+        print(f"{'endpoint':<22}{'server':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for endpoint in endpoints:
+            for kind, port in servers.items():
+                stats = asyncio.run(run_load(f'http://127.0.0.1:{port}', endpoint,
+                                             args.requests, args.concurrency))
+                print(f"{endpoint:<22}{kind:<8}{stats['rps']:>10.1f}{stats['p50']:>10.1f}{stats['p95']:>10.1f}")
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
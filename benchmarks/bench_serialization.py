@@ -0,0 +1,74 @@
+"""
+Benchmark JSON serialization and compression of the list endpoints.
+
+Compares the original path (ORM objects -> to_dict() -> stdlib json) with the
+Core rows + FastJSONProvider path, then reports compressed sizes. Synthetic
+sales are added inside a transaction that is rolled back at the end:
+
+    python benchmarks/bench_serialization.py --rows 50000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import app
+from models.database import db, Product, Sale
+from models.queries import sale_rows
+from services.compression import brotli, compress
+from services.json_provider import FastJSONProvider
+
+
+def cpu_ms(func, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        result = func()
+    return (time.process_time() - start) * 1000 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000, help='synthetic sales to add')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    stdlib = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+
+    with app.app_context():
+        product_ids = [pid for (pid,) in db.session.query(Product.product_id)]
+        start = date.today() - timedelta(days=365)
+        db.session.add_all([
+            Sale(product_id=random.choice(product_ids), quantity_sold=random.randint(1, 20),
+                 sale_date=start + timedelta(days=random.randint(0, 365)))
+            for _ in range(args.rows)
+        ])
+        db.session.flush()
+
+        def orm_stdlib():
+            db.session.expunge_all()
+            return stdlib.dumps([s.to_dict() for s in Sale.query.all()], separators=(',', ':')).encode()
+
+        def core_fast():
+            return fast.dumps(sale_rows()).encode()
+
+        try:
+            print(f"{'path':<24}{'CPU ms':>10}{'bytes':>12}{'gzip':>10}{'gzip ms':>10}{'br':>10}")
+            for name, func in [('ORM + stdlib json', orm_stdlib), ('Core rows + orjson', core_fast)]:
+                elapsed, body = cpu_ms(func, args.repeat)
+                gz_ms, gz = cpu_ms(lambda: compress(body, 'gzip'), args.repeat)
+                br = len(compress(body, 'br')) if brotli is not None else float('nan')
+                print(f'{name:<24}{elapsed:>10.1f}{len(body):>12}{len(gz):>10}{gz_ms:>10.1f}{br:>10}')
+        finally:
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Per-table data versions for cache keys.
+
+Every flush that inserts, updates or deletes ORM rows bumps the version of
+each table it touched, in the same transaction as the change. A cache key
+that includes the versions of the tables a result was built from therefore
+changes exactly when that data does, in every worker process, and a rolled
+back change leaves the versions alone.
+
+Reads are memoized per app context (one request); the memo is dropped when
+the request itself writes.
+"""
+from flask import g, has_app_context
+from sqlalchemy import event
+
+from models.database import db, DataVersion
+
+
+def _touched_tables(session):
+    tables = set()
+    for obj in (*session.new, *session.deleted):
+        tables.add(obj.__table__.name)
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            tables.add(obj.__table__.name)
+    tables.discard(DataVersion.__tablename__)
+    return tables
+
+
+def _bump_versions(session, flush_context):
+    tables = _touched_tables(session)
+    if tables:
+        bump_versions(session, tables)
+
+
+def bump_versions(session, tables):
+    """Bump versions in session's transaction, for writes made outside the ORM unit of work"""
+    session.connection(bind_arguments={'mapper': DataVersion}).execute(
+        db.update(DataVersion).where(DataVersion.table_name.in_(tables)).values(version=DataVersion.version + 1)
+    )
+    if has_app_context():
+        g.pop('_data_versions', None)
+
+
+def data_versions(*tables, session=None):
+    """Current versions of the given tables (all tables if none are given)"""
+    if has_app_context() and session is None and '_data_versions' in g:
+        versions = g._data_versions
+    else:
+        versions = dict((session or db.session).query(DataVersion.table_name, DataVersion.version).all())
+        if has_app_context() and session is None:
+            g._data_versions = versions
+    if not tables:
+        return dict(versions)
+    return {table: versions.get(table, 0) for table in tables}
+
+
+def seed_versions(engine=None):
+    """Create a version row for every table that doesn't have one yet"""
+    engine = engine or db.engine
+    with engine.begin() as conn:
+        existing = set(conn.execute(db.select(DataVersion.table_name)).scalars())
+        missing = [{'table_name': table.name, 'version': 0} for table in db.metadata.sorted_tables
+                   if table.name not in existing and table.name != DataVersion.__tablename__]
+        if missing:
+            conn.execute(db.insert(DataVersion), missing)
+
+
+def init_data_versions(app):
+    """Track table versions on the app's session"""
+    with app.app_context():
+        seed_versions()
+    if not event.contains(db.session, 'after_flush', _bump_versions):
+        event.listen(db.session, 'after_flush', _bump_versions)
+    app.extensions['data_versions'] = data_versions
+    return data_versions
@@ -1,9 +1,21 @@
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
-db = SQLAlchemy()
+class TenantSession(Session):
+    """Session whose engine choice can be routed per tenant (see models/tenancy.py)"""
+    route_bind = None
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and TenantSession.route_bind is not None:
+            engine = TenantSession.route_bind(mapper, clause)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(session_options={'class_': TenantSession})
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -14,6 +26,7 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(200), nullable=False)
     join_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     is_admin = db.Column(db.Boolean, default=False)
+    company_name = db.Column(db.String(100))
     
     # Relationships
     activity_logs = db.relationship('ActivityLog', backref='user', lazy=True, cascade='all, delete-orphan')
@@ -33,7 +46,8 @@ class User(UserMixin, db.Model):
             'username': self.username,
             'email': self.email,
             'join_date': self.join_date.strftime('%Y-%m-%d %H:%M:%S') if self.join_date else None,
-            'is_admin': self.is_admin
+            'is_admin': self.is_admin,
+            'company_name': self.company_name
         }
 
 class ActivityLog(db.Model):
@@ -71,6 +85,8 @@ class Product(db.Model):
     inventory = db.relationship('Inventory', backref='product', lazy=True, cascade='all, delete-orphan')
     sales = db.relationship('Sale', backref='product', lazy=True, cascade='all, delete-orphan')
     purchases = db.relationship('Purchase', backref='product', lazy=True, cascade='all, delete-orphan')
+    location_stock = db.relationship('LocationStock', backref='product', lazy=True, cascade='all, delete-orphan')
+    alerts = db.relationship('Alert', backref='product', lazy=True, cascade='all, delete-orphan')
     
     def to_dict(self):
         return {
@@ -97,6 +113,44 @@ class Supplier(db.Model):
             'contact_info': self.contact_info
         }
 
+class Location(db.Model):
+    __tablename__ = 'locations'
+    
+    location_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    location_name = db.Column(db.String(100), unique=True, nullable=False)
+    address = db.Column(db.String(200), nullable=True)
+    is_default = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
+    
+    # Relationships
+    stock = db.relationship('LocationStock', backref='location', lazy=True, cascade='all, delete-orphan')
+    
+    def to_dict(self):
+        return {
+            'location_id': self.location_id,
+            'location_name': self.location_name,
+            'address': self.address,
+            'is_default': self.is_default
+        }
+
+class LocationStock(db.Model):
+    """Stock of one product at one location; Inventory.stock_quantity holds the total"""
+    __tablename__ = 'location_stock'
+    __table_args__ = (db.UniqueConstraint('location_id', 'product_id'),)
+    
+    location_stock_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    location_id = db.Column(db.Integer, db.ForeignKey('locations.location_id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False, index=True)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'location_id': self.location_id,
+            'location_name': self.location.location_name if self.location else None,
+            'product_id': self.product_id,
+            'product_name': self.product.product_name if self.product else None,
+            'quantity': self.quantity
+        }
+
 class Inventory(db.Model):
     __tablename__ = 'inventory'
     
@@ -104,6 +158,7 @@ class Inventory(db.Model):
     product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
     stock_quantity = db.Column(db.Integer, nullable=False, default=0)
     restock_date = db.Column(db.Date, nullable=True)
+    low_stock_threshold = db.Column(db.Integer, nullable=False, default=20, server_default='20')
     
     def to_dict(self):
         return {
@@ -111,16 +166,58 @@ class Inventory(db.Model):
             'product_id': self.product_id,
             'product_name': self.product.product_name if self.product else None,
             'stock_quantity': self.stock_quantity,
-            'restock_date': self.restock_date.strftime('%Y-%m-%d') if self.restock_date else None
+            'restock_date': self.restock_date.strftime('%Y-%m-%d') if self.restock_date else None,
+            'low_stock_threshold': self.low_stock_threshold
+        }
+
+class StockMovement(db.Model):
+    """Append-only ledger entry; every stock change writes one row"""
+    __tablename__ = 'stock_movements'
+    __table_args__ = (db.Index('ix_stock_movements_product', 'product_id', 'movement_id'),)
+    
+    movement_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
+    location_id = db.Column(db.Integer, db.ForeignKey('locations.location_id'), nullable=True)
+    quantity_change = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(50), nullable=False)
+    reference_table = db.Column(db.String(100), nullable=True)
+    reference_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    def to_dict(self):
+        return {
+            'movement_id': self.movement_id,
+            'product_id': self.product_id,
+            'location_id': self.location_id,
+            'quantity_change': self.quantity_change,
+            'reason': self.reason,
+            'reference_table': self.reference_table,
+            'reference_id': self.reference_id,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None
         }
 
+class StockSnapshot(db.Model):
+    """Product total as of a ledger movement, so as-of queries replay a bounded tail"""
+    __tablename__ = 'stock_snapshots'
+    __table_args__ = (db.Index('ix_stock_snapshots_product', 'product_id', 'taken_at'),)
+    
+    snapshot_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
+    movement_id = db.Column(db.Integer, db.ForeignKey('stock_movements.movement_id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    taken_at = db.Column(db.DateTime, nullable=False)
+
 class Sale(db.Model):
     __tablename__ = 'sales'
+    # AUTOINCREMENT: ids of deleted sales are never handed out again, which the
+    # sales snapshot's append-only sync relies on
+    __table_args__ = (db.Index('ix_sales_product_date', 'product_id', 'sale_date'), {'sqlite_autoincrement': True})
     
     sale_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
     quantity_sold = db.Column(db.Integer, nullable=False)
     sale_date = db.Column(db.Date, nullable=False, default=datetime.utcnow)
+    location_id = db.Column(db.Integer, db.ForeignKey('locations.location_id'), nullable=True)
     
     def to_dict(self):
         return {
@@ -128,7 +225,31 @@ class Sale(db.Model):
             'product_id': self.product_id,
             'product_name': self.product.product_name if self.product else None,
             'quantity_sold': self.quantity_sold,
-            'sale_date': self.sale_date.strftime('%Y-%m-%d') if self.sale_date else None
+            'sale_date': self.sale_date.strftime('%Y-%m-%d') if self.sale_date else None,
+            'location_id': self.location_id
+        }
+
+class SalesPartition(db.Model):
+    """A closed year of sales moved to its archive table, with precomputed totals"""
+    __tablename__ = 'sales_partitions'
+    
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    total_quantity = db.Column(db.Integer, nullable=False, default=0)
+    first_sale_date = db.Column(db.Date, nullable=True)
+    last_sale_date = db.Column(db.Date, nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'year': self.year,
+            'table_name': self.table_name,
+            'row_count': self.row_count,
+            'total_quantity': self.total_quantity,
+            'first_sale_date': self.first_sale_date.strftime('%Y-%m-%d') if self.first_sale_date else None,
+            'last_sale_date': self.last_sale_date.strftime('%Y-%m-%d') if self.last_sale_date else None,
+            'archived_at': self.archived_at.strftime('%Y-%m-%d %H:%M:%S') if self.archived_at else None
         }
 
 class Purchase(db.Model):
@@ -139,6 +260,7 @@ class Purchase(db.Model):
     supplier_id = db.Column(db.Integer, db.ForeignKey('suppliers.supplier_id'), nullable=False)
     quantity_purchased = db.Column(db.Integer, nullable=False)
     purchase_date = db.Column(db.Date, nullable=False, default=datetime.utcnow)
+    location_id = db.Column(db.Integer, db.ForeignKey('locations.location_id'), nullable=True)
     
     def to_dict(self):
         return {
@@ -148,14 +270,96 @@ class Purchase(db.Model):
             'supplier_id': self.supplier_id,
             'supplier_name': self.supplier.supplier_name if self.supplier else None,
             'quantity_purchased': self.quantity_purchased,
-            'purchase_date': self.purchase_date.strftime('%Y-%m-%d') if self.purchase_date else None
+            'purchase_date': self.purchase_date.strftime('%Y-%m-%d') if self.purchase_date else None,
+            'location_id': self.location_id
+        }
+
+class Alert(db.Model):
+    """A stock alert raised by a rule; at most one is active per product and rule"""
+    __tablename__ = 'alerts'
+    __table_args__ = (
+        db.Index('ix_alerts_active', 'product_id', 'rule', unique=True, sqlite_where=db.text("status = 'active'")),
+        db.Index('ix_alerts_status', 'status', 'updated_at'),
+    )
+    
+    alert_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
+    rule = db.Column(db.String(50), nullable=False)
+    severity = db.Column(db.String(20), nullable=False, default='warning')
+    status = db.Column(db.String(20), nullable=False, default='active')
+    message = db.Column(db.String(500))
+    value = db.Column(db.Float)
+    threshold = db.Column(db.Float)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    resolved_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'alert_id': self.alert_id,
+            'product_id': self.product_id,
+            'product_name': self.product.product_name if self.product else None,
+            'rule': self.rule,
+            'severity': self.severity,
+            'status': self.status,
+            'message': self.message,
+            'value': self.value,
+            'threshold': self.threshold,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None,
+            'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S') if self.updated_at else None,
+            'resolved_at': self.resolved_at.strftime('%Y-%m-%d %H:%M:%S') if self.resolved_at else None
         }
 
+class DataVersion(db.Model):
+    """Change counter per table, bumped by every flush that writes to it"""
+    __tablename__ = 'data_versions'
+    
+    table_name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+def _add_autoincrement(conn, table):
+    """Rebuild a table created without AUTOINCREMENT, keeping its rows and ids"""
+    old_name = f'_{table.name}_old'
+    for index in table.indexes:
+        conn.execute(db.text(f'DROP INDEX IF EXISTS {index.name}'))
+    conn.execute(db.text(f'ALTER TABLE {table.name} RENAME TO {old_name}'))
+    table.create(conn)
+    columns = ', '.join(column.name for column in table.columns)
+    conn.execute(db.text(f'INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {old_name}'))
+    conn.execute(db.text(f'DROP TABLE {old_name}'))
+
+def upgrade_schema(engine=None):
+    """Add columns and indexes introduced after an existing database was created"""
+    engine = engine or db.engine
+    inspector = db.inspect(engine)
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}'
+                if column.server_default is not None:
+                    ddl += f" DEFAULT '{column.server_default.arg}'"
+                    if not column.nullable:
+                        ddl += ' NOT NULL'
+                conn.execute(db.text(ddl))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+            if table.dialect_options['sqlite']['autoincrement']:
+                sql = conn.execute(db.text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                                   {'name': table.name}).scalar()
+                if 'AUTOINCREMENT' not in sql.upper():
+                    _add_autoincrement(conn, table)
+
 def init_db(app):
     """Initialize the database with sample data"""
     db.init_app(app)
     with app.app_context():
         db.create_all()
+        upgrade_schema()
         
         # Create default admin user if none exists
         if User.query.count() == 0:
@@ -235,3 +439,35 @@ def init_db(app):
             db.session.commit()
             
             print("Database initialized with sample data!")
+        
+        # Every database needs a default location; existing stock starts there
+        if Location.query.count() == 0:
+            main_warehouse = Location(location_name='Main Warehouse', is_default=True)
+            db.session.add(main_warehouse)
+            db.session.flush()
+            opening_stock = {}
+            for inventory in Inventory.query.order_by(Inventory.inventory_id):
+                opening_stock.setdefault(inventory.product_id, inventory.stock_quantity)
+            db.session.add_all([
+                LocationStock(location_id=main_warehouse.location_id, product_id=product_id, quantity=quantity)
+                for product_id, quantity in opening_stock.items()
+            ])
+            Sale.query.update({Sale.location_id: main_warehouse.location_id})
+            Purchase.query.update({Purchase.location_id: main_warehouse.location_id})
+            db.session.commit()
+        
+        # Start the stock ledger from the current location stock
+        if StockMovement.query.count() == 0:
+            opening_time = datetime.utcnow()
+            for row in LocationStock.query.order_by(LocationStock.location_stock_id):
+                db.session.add(StockMovement(product_id=row.product_id, location_id=row.location_id,
+                                             quantity_change=row.quantity, reason='opening',
+                                             created_at=opening_time))
+            db.session.flush()
+            for product_id, movement_id, quantity in db.session.query(
+                StockMovement.product_id, db.func.max(StockMovement.movement_id),
+                db.func.sum(StockMovement.quantity_change)
+            ).group_by(StockMovement.product_id):
+                db.session.add(StockSnapshot(product_id=product_id, movement_id=movement_id,
+                                             quantity=quantity, taken_at=opening_time))
+            db.session.commit()
@@ -0,0 +1,163 @@
+"""
+Append-only stock movement ledger.
+
+models/locations.py records a StockMovement for every change it applies, so
+the ledger sums to Inventory/LocationStock at all times. Every
+SNAPSHOT_INTERVAL movements of a product a StockSnapshot stores its running
+total; stock_as_of() starts from the newest snapshot before the cutoff and
+sums at most that many later movements instead of replaying history.
+reconcile() re-derives stock from the full ledger and lists any row of
+inventory or location_stock that disagrees.
+
+Movement times are UTC, like the rest of the timestamps in the database,
+and record when a change was entered: a sale or purchase backdated with
+sale_date/purchase_date counts towards stock as of the time it was recorded,
+not its business date. Snapshots rely on that order matching movement ids.
+"""
+from datetime import datetime, timedelta
+
+from models.database import db, Product, Inventory, LocationStock, StockMovement, StockSnapshot
+
+SNAPSHOT_INTERVAL = 50
+
+
+def record_movement(product_id, location_id, quantity_change, reason, reference=None):
+    """Append a ledger row for a stock change in the current transaction
+
+    reference is the ORM object behind the change, or a (table, id) pair for
+    rows outside the ORM such as archived sales.
+    """
+    reference_table = reference_id = None
+    if isinstance(reference, tuple):
+        reference_table, reference_id = reference
+    elif reference is not None:
+        state = db.inspect(reference)
+        if state.identity is None:
+            db.session.flush()
+        reference_table = state.mapper.local_table.name
+        reference_id = state.identity[0]
+
+    movement = StockMovement(
+        product_id=product_id,
+        location_id=location_id,
+        quantity_change=quantity_change,
+        reason=reason,
+        reference_table=reference_table,
+        reference_id=reference_id,
+        created_at=datetime.utcnow()
+    )
+    db.session.add(movement)
+    db.session.flush()
+    _maybe_snapshot(product_id, movement)
+    return movement
+
+
+def _latest_snapshot(product_id):
+    return StockSnapshot.query.filter_by(product_id=product_id).order_by(StockSnapshot.movement_id.desc()).first()
+
+
+def _maybe_snapshot(product_id, movement):
+    """Snapshot the product once SNAPSHOT_INTERVAL movements follow the last one"""
+    snapshot = _latest_snapshot(product_id)
+    since = snapshot.movement_id if snapshot else 0
+    pending, delta = db.session.query(
+        db.func.count(StockMovement.movement_id), db.func.coalesce(db.func.sum(StockMovement.quantity_change), 0)
+    ).filter(StockMovement.product_id == product_id, StockMovement.movement_id > since).one()
+    if pending >= SNAPSHOT_INTERVAL:
+        take_snapshot(product_id, (snapshot.quantity if snapshot else 0) + delta, movement)
+
+
+def take_snapshot(product_id, quantity, movement):
+    db.session.add(StockSnapshot(product_id=product_id, movement_id=movement.movement_id,
+                                 quantity=quantity, taken_at=movement.created_at))
+
+
+def snapshot_all():
+    """Snapshot every product with movements since its last snapshot (periodic job)"""
+    taken = 0
+    latest_movements = db.session.query(
+        StockMovement.product_id, db.func.max(StockMovement.movement_id)
+    ).group_by(StockMovement.product_id).all()
+
+    for product_id, movement_id in latest_movements:
+        snapshot = _latest_snapshot(product_id)
+        since = snapshot.movement_id if snapshot else 0
+        if since >= movement_id:
+            continue
+        delta = db.session.query(db.func.sum(StockMovement.quantity_change)).filter(
+            StockMovement.product_id == product_id,
+            StockMovement.movement_id > since,
+            StockMovement.movement_id <= movement_id
+        ).scalar()
+        take_snapshot(product_id, (snapshot.quantity if snapshot else 0) + delta,
+                      db.session.get(StockMovement, movement_id))
+        taken += 1
+    db.session.commit()
+    return taken
+
+
+def stock_as_of(cutoff, product_id=None, session=None):
+    """Product totals from movements recorded before cutoff: {product_id: quantity}"""
+    session = session or db.session
+
+    # Per product: the newest snapshot taken before the cutoff, then only the
+    # movements after it, a range on ix_stock_movements_product
+    since = db.select(db.func.max(StockSnapshot.movement_id)).where(
+        StockSnapshot.product_id == Product.product_id, StockSnapshot.taken_at < cutoff
+    ).correlate(Product).scalar_subquery()
+    base = db.select(StockSnapshot.quantity).where(
+        StockSnapshot.product_id == Product.product_id, StockSnapshot.movement_id == since
+    ).correlate(Product).scalar_subquery()
+    delta = db.select(db.func.sum(StockMovement.quantity_change)).where(
+        StockMovement.product_id == Product.product_id,
+        StockMovement.movement_id > db.func.coalesce(since, 0),
+        StockMovement.created_at < cutoff
+    ).correlate(Product).scalar_subquery()
+
+    query = session.query(Product.product_id, base, delta)
+    if product_id is not None:
+        query = query.filter(Product.product_id == product_id)
+
+    totals = {}
+    for pid, quantity, change in query:
+        # Products with neither a snapshot nor movements before the cutoff didn't exist yet
+        if quantity is not None or change is not None:
+            totals[pid] = (quantity or 0) + (change or 0)
+    return totals
+
+
+def stock_on_date(day, product_id=None, session=None):
+    """Stock at the end of a calendar day (UTC)"""
+    cutoff = datetime(day.year, day.month, day.day) + timedelta(days=1)
+    return stock_as_of(cutoff, product_id=product_id, session=session)
+
+
+def reconcile(session=None):
+    """Compare the full ledger with inventory and location_stock; returns mismatches"""
+    session = session or db.session
+    mismatches = []
+
+    ledger_totals = dict(session.query(
+        StockMovement.product_id, db.func.sum(StockMovement.quantity_change)
+    ).group_by(StockMovement.product_id).all())
+    seen = set()
+    for inventory in session.query(Inventory).order_by(Inventory.inventory_id):
+        if inventory.product_id in seen:
+            continue
+        seen.add(inventory.product_id)
+        expected = ledger_totals.get(inventory.product_id, 0)
+        if expected != inventory.stock_quantity:
+            mismatches.append({'table': 'inventory', 'product_id': inventory.product_id, 'location_id': None,
+                               'ledger': expected, 'recorded': inventory.stock_quantity})
+
+    ledger_locations = {
+        (pid, lid): quantity for pid, lid, quantity in session.query(
+            StockMovement.product_id, StockMovement.location_id, db.func.sum(StockMovement.quantity_change)
+        ).group_by(StockMovement.product_id, StockMovement.location_id)
+    }
+    for row in session.query(LocationStock):
+        expected = ledger_locations.get((row.product_id, row.location_id), 0)
+        if expected != row.quantity:
+            mismatches.append({'table': 'location_stock', 'product_id': row.product_id,
+                               'location_id': row.location_id, 'ledger': expected, 'recorded': row.quantity})
+    return mismatches
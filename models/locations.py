@@ -0,0 +1,81 @@
+"""
+Per-location stock with a maintained per-product total.
+
+LocationStock rows hold what each warehouse has; Inventory.stock_quantity is
+kept equal to their sum by adjusting both in the same transaction, so
+availability and low-stock queries read one row per product and never sum
+across locations. All stock mutations should go through adjust_stock() or
+transfer_stock(), which also append to the stock movement ledger.
+"""
+from models.database import db, Inventory, Location, LocationStock
+from models.ledger import record_movement
+
+
+class StockError(ValueError):
+    """A stock change that would leave a location negative"""
+
+
+def default_location():
+    """The location used when a request doesn't name one"""
+    location = Location.query.filter_by(is_default=True).first()
+    if location is None:
+        location = Location.query.order_by(Location.location_id).first()
+    return location
+
+
+def resolve_location(location_id=None):
+    """Location for an optional id from a request, falling back to the default"""
+    if location_id in (None, ''):
+        return default_location()
+    location = db.session.get(Location, int(location_id))
+    if location is None:
+        raise StockError(f'Location {location_id} not found')
+    return location
+
+
+def location_stock(product_id, location_id):
+    """LocationStock row for a product at a location, created empty if missing"""
+    row = LocationStock.query.filter_by(product_id=product_id, location_id=location_id).first()
+    if row is None:
+        row = LocationStock(product_id=product_id, location_id=location_id, quantity=0)
+        db.session.add(row)
+    return row
+
+
+def adjust_stock(inventory, location, delta, reason='adjustment', reference=None):
+    """Apply delta units at a location and to the product total (no commit)"""
+    row = location_stock(inventory.product_id, location.location_id)
+    if row.quantity + delta < 0:
+        raise StockError(f'Insufficient stock at {location.location_name}. Available: {row.quantity}')
+    row.quantity += delta
+    inventory.stock_quantity += delta
+    if delta:
+        record_movement(inventory.product_id, location.location_id, delta, reason, reference)
+    return row
+
+
+def transfer_stock(product_id, from_location, to_location, quantity):
+    """Move units between locations; the product total is unchanged (no commit)"""
+    if quantity <= 0:
+        raise StockError('Transfer quantity must be positive')
+    if from_location.location_id == to_location.location_id:
+        raise StockError('Source and destination locations are the same')
+    source = location_stock(product_id, from_location.location_id)
+    if source.quantity < quantity:
+        raise StockError(f'Insufficient stock at {from_location.location_name}. Available: {source.quantity}')
+    destination = location_stock(product_id, to_location.location_id)
+    source.quantity -= quantity
+    destination.quantity += quantity
+    record_movement(product_id, from_location.location_id, -quantity, 'transfer_out')
+    record_movement(product_id, to_location.location_id, quantity, 'transfer_in')
+    return source, destination
+
+
+def stock_by_location(product_id):
+    """All location rows for a product"""
+    return LocationStock.query.filter_by(product_id=product_id).order_by(LocationStock.location_id).all()
+
+
+def product_inventory(product_id):
+    """The Inventory row carrying a product's total"""
+    return Inventory.query.filter_by(product_id=product_id).first()
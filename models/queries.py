@@ -0,0 +1,62 @@
+"""
+Row-level queries for the list API endpoints.
+
+These select the exact columns each endpoint returns with SQLAlchemy Core and
+map result rows straight to dicts, skipping ORM object hydration, identity
+map bookkeeping and per-row lazy loads of product/supplier names. Dates stay
+as date objects and are encoded by the app's JSON provider. The output
+matches the models' to_dict() methods.
+"""
+from sqlalchemy import select
+
+from models.database import db, Product, Supplier, Inventory, Purchase
+from models.sales_partitions import sales_source
+
+
+def _rows(statement, session=None):
+    session = session or db.session
+    return [row._asdict() for row in session.execute(statement)]
+
+
+def product_rows(session=None):
+    return _rows(select(Product.product_id, Product.product_name, Product.category, Product.price)
+                 .order_by(Product.product_id), session)
+
+
+def supplier_rows(session=None):
+    return _rows(select(Supplier.supplier_id, Supplier.supplier_name, Supplier.contact_info)
+                 .order_by(Supplier.supplier_id), session)
+
+
+def inventory_rows(session=None):
+    return _rows(
+        select(Inventory.inventory_id, Inventory.product_id, Product.product_name, Inventory.stock_quantity,
+               Inventory.restock_date, Inventory.low_stock_threshold)
+        .outerjoin(Product, Product.product_id == Inventory.product_id)
+        .order_by(Inventory.inventory_id),
+        session
+    )
+
+
+def sale_rows(session=None, start=None, end=None, newest_first=False):
+    """Sales dated in [start, end), read from only the partitions covering it"""
+    sales = sales_source(start, end, session)
+    order = (sales.c.sale_date.desc(), sales.c.sale_id.desc()) if newest_first else (sales.c.sale_id,)
+    return _rows(
+        select(sales.c.sale_id, sales.c.product_id, Product.product_name, sales.c.quantity_sold, sales.c.sale_date,
+               sales.c.location_id)
+        .outerjoin(Product, Product.product_id == sales.c.product_id)
+        .order_by(*order),
+        session
+    )
+
+
+def purchase_rows(session=None):
+    return _rows(
+        select(Purchase.purchase_id, Purchase.product_id, Product.product_name, Purchase.supplier_id,
+               Supplier.supplier_name, Purchase.quantity_purchased, Purchase.purchase_date, Purchase.location_id)
+        .outerjoin(Product, Product.product_id == Purchase.product_id)
+        .outerjoin(Supplier, Supplier.supplier_id == Purchase.supplier_id)
+        .order_by(Purchase.purchase_id),
+        session
+    )
@@ -0,0 +1,136 @@
+"""
+Read/write routing for analytics queries.
+
+Transactional writes keep using db.session on the primary engine. Long
+analytics scans (ai/predictor.py, dashboard KPIs) go through
+analytics_session(), which is bound to a separate engine with its own pool:
+
+- 'readonly': the primary SQLite file opened with a mode=ro URI. The primary
+  is switched to WAL so these readers never block writers. Zero staleness.
+- 'snapshot': a copy of the primary taken with the SQLite backup API and
+  refreshed once it is older than ANALYTICS_MAX_STALENESS seconds.
+- 'primary': no routing, analytics share the primary engine.
+
+ANALYTICS_DATABASE_URI points analytics at an external replica instead.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from flask import current_app
+from flask.globals import app_ctx
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from models.database import db
+from models.tenancy import current_tenant
+
+read_session = scoped_session(sessionmaker(), scopefunc=lambda: id(app_ctx._get_current_object()))
+
+
+class ReadRouter:
+    """Owns the read-only engine and keeps snapshot copies fresh"""
+
+    def __init__(self):
+        self.engine = None
+        self.mode = 'primary'
+        self.max_staleness = 0
+        self.snapshot_path = None
+        self.snapshot_taken_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('ANALYTICS_READ_MODE', 'readonly')
+        app.config.setdefault('ANALYTICS_DATABASE_URI', None)
+        app.config.setdefault('ANALYTICS_MAX_STALENESS', 60)
+        app.config.setdefault('ANALYTICS_POOL_SIZE', 5)
+        app.config.setdefault('ANALYTICS_SNAPSHOT_PATH',
+                              os.path.join(app.instance_path, 'analytics_snapshot.db'))
+
+        self.mode = app.config['ANALYTICS_READ_MODE']
+        self.max_staleness = app.config['ANALYTICS_MAX_STALENESS']
+        pool_size = app.config['ANALYTICS_POOL_SIZE']
+
+        with app.app_context():
+            primary = db.engine
+            is_sqlite = primary.url.get_backend_name() == 'sqlite'
+
+            if app.config['ANALYTICS_DATABASE_URI']:
+                self.mode = 'replica'
+                self.engine = create_engine(app.config['ANALYTICS_DATABASE_URI'], pool_size=pool_size)
+            elif self.mode == 'primary' or not is_sqlite:
+                self.mode = 'primary'
+                self.engine = primary
+            elif self.mode == 'snapshot':
+                self.snapshot_path = app.config['ANALYTICS_SNAPSHOT_PATH']
+                self._take_snapshot(primary)
+                self.engine = _readonly_engine(self.snapshot_path, pool_size)
+            else:
+                _enable_wal(primary)
+                self.engine = _readonly_engine(primary.url.database, pool_size)
+
+        read_session.session_factory.configure(bind=self.engine)
+        app.teardown_appcontext(lambda exc: read_session.remove())
+        app.extensions['read_router'] = self
+
+    def session(self):
+        """Session for analytics reads, refreshing the snapshot if it is too stale"""
+        if self.mode == 'snapshot' and time.time() - self.snapshot_taken_at > self.max_staleness:
+            self.refresh()
+        return read_session
+
+    def refresh(self):
+        """Copy the primary into a fresh snapshot file and swap it in"""
+        with self._lock:
+            if time.time() - self.snapshot_taken_at <= self.max_staleness:
+                return
+            read_session.remove()
+            self._take_snapshot(db.engine)
+            self.engine.dispose()
+
+    def _take_snapshot(self, primary):
+        tmp_path = self.snapshot_path + '.tmp'
+        source = primary.raw_connection()
+        try:
+            target = sqlite3.connect(tmp_path)
+            try:
+                source.driver_connection.backup(target)
+            finally:
+                target.close()
+        finally:
+            source.close()
+        os.replace(tmp_path, self.snapshot_path)
+        self.snapshot_taken_at = time.time()
+
+
+def _readonly_engine(path, pool_size):
+    return create_engine(f'sqlite:///file:{path}?mode=ro&uri=true', pool_size=pool_size,
+                         connect_args={'check_same_thread': False})
+
+
+def _enable_wal(engine):
+    """Let read-only connections run alongside writers"""
+    @event.listens_for(engine, 'connect')
+    def set_wal(dbapi_connection, connection_record):
+        dbapi_connection.execute('PRAGMA journal_mode=WAL')
+
+    engine.dispose()
+    with engine.connect():
+        pass
+
+
+router = ReadRouter()
+
+
+def init_read_routing(app):
+    """Set up the analytics read engine for the app"""
+    router.init_app(app)
+
+
+def analytics_session():
+    """Session analytics code should query through instead of db.session"""
+    if 'read_router' not in current_app.extensions or current_tenant() is not None:
+        # Replicas and snapshots only exist for the primary database
+        return db.session
+    return router.session()
@@ -0,0 +1,185 @@
+"""
+Yearly partitions of the sales table.
+
+`flask archive-sales` moves every closed year (before the current one by
+default) out of the hot `sales` table into its own archive table,
+sales_<year>, in the same database, and records the year's row count and
+units sold in sales_partitions. New sales, including backdated ones, always
+go to the hot table, numbered above every archived id. Archived sales are
+only ever deleted (delete_archived_sales), which keeps the partition totals
+in step.
+
+Readers ask for the sales of a date range with sales_source(start, end),
+which selects from the hot table plus only the archives whose year overlaps
+the range, so queries about recent sales never touch an archive. Totals over
+all time add the precomputed partition totals to a sum over the hot table
+(total_quantity_sold).
+"""
+from datetime import date, datetime
+
+from sqlalchemy import select, union_all
+
+from models.database import db, Sale, SalesPartition
+from models.data_versions import bump_versions
+
+# Archive tables are created by archive_sales, never by create_all
+archive_metadata = db.MetaData()
+
+
+def archive_name(year):
+    return f'{Sale.__tablename__}_{year}'
+
+
+def archive_table(year):
+    """Table object for a year's archive, with the hot table's columns"""
+    name = archive_name(year)
+    table = archive_metadata.tables.get(name)
+    if table is None:
+        columns = [db.Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+                   for column in Sale.__table__.columns]
+        table = db.Table(name, archive_metadata, *columns,
+                         db.Index(f'ix_{name}_product_date', 'product_id', 'sale_date'))
+    return table
+
+
+def year_bounds(year):
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def archived_years(session=None):
+    """Years moved out of the hot table, oldest first"""
+    session = session or db.session
+    return [year for (year,) in session.query(SalesPartition.year).order_by(SalesPartition.year)]
+
+
+def routed_years(years, start=None, end=None):
+    """The archived years that can hold sales dated in [start, end)"""
+    routed = []
+    for year in years:
+        first, after = year_bounds(year)
+        if (start is None or start < after) and (end is None or end > first):
+            routed.append(year)
+    return routed
+
+
+def hot_start(session=None):
+    """First day not covered by an archive (None if nothing is archived)"""
+    years = archived_years(session)
+    return date(years[-1] + 1, 1, 1) if years else None
+
+
+def sales_source(start=None, end=None, session=None):
+    """Sales dated in [start, end) as one subquery with the sales table's columns"""
+    tables = [Sale.__table__] + [archive_table(year) for year in routed_years(archived_years(session), start, end)]
+    selects = []
+    for table in tables:
+        statement = select(*[table.c[column.name] for column in Sale.__table__.columns])
+        if start is not None:
+            statement = statement.where(table.c.sale_date >= start)
+        if end is not None:
+            statement = statement.where(table.c.sale_date < end)
+        selects.append(statement)
+    statement = selects[0] if len(selects) == 1 else union_all(*selects)
+    return statement.subquery('all_sales')
+
+
+def total_quantity_sold(session=None):
+    """Units sold over all time: the hot table plus the archived totals"""
+    session = session or db.session
+    hot = session.query(db.func.coalesce(db.func.sum(Sale.quantity_sold), 0)).scalar()
+    archived = session.query(db.func.coalesce(db.func.sum(SalesPartition.total_quantity), 0)).scalar()
+    return hot + archived
+
+
+def find_archived_sale(sale_id, session=None):
+    """The archived row of a sale no longer in the hot table, or None"""
+    session = session or db.session
+    for year in archived_years(session):
+        table = archive_table(year)
+        row = session.execute(select(table).where(table.c.sale_id == sale_id)).first()
+        if row is not None:
+            return row
+    return None
+
+
+def delete_archived_sales(condition, session=None):
+    """Delete the archived rows matching condition(table), adjusting their partitions (no commit)"""
+    session = session or db.session
+    deleted = 0
+    for partition in session.query(SalesPartition).order_by(SalesPartition.year):
+        table = archive_table(partition.year)
+        where = condition(table)
+        row_count, quantity = session.execute(
+            select(db.func.count(), db.func.coalesce(db.func.sum(table.c.quantity_sold), 0)).where(where)
+        ).one()
+        if not row_count:
+            continue
+        session.execute(table.delete().where(where))
+        partition.row_count -= row_count
+        partition.total_quantity -= quantity
+        partition.first_sale_date, partition.last_sale_date = session.execute(
+            select(db.func.min(table.c.sale_date), db.func.max(table.c.sale_date))
+        ).one()
+        deleted += row_count
+
+    if deleted:
+        session.flush()
+        bump_versions(session, [Sale.__tablename__])
+    return deleted
+
+
+def _reserve_archived_ids(session):
+    """Make SQLite number new sales above every archived sale_id"""
+    top = max((session.query(db.func.max(archive_table(year).c.sale_id)).scalar() or 0
+               for year in archived_years(session)), default=0)
+    connection = session.connection(bind_arguments={'mapper': Sale})
+    params = {'name': Sale.__tablename__, 'top': top}
+    connection.execute(db.text('UPDATE sqlite_sequence SET seq = :top WHERE name = :name AND seq < :top'), params)
+    connection.execute(db.text('INSERT INTO sqlite_sequence (name, seq) SELECT :name, :top '
+                               'WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = :name)'), params)
+
+
+def archive_sales(before_year=None, session=None):
+    """Move sales dated before before_year (default: this year) to yearly archive tables"""
+    session = session or db.session
+    before_year = before_year or date.today().year
+    sale_year = db.cast(db.func.strftime('%Y', Sale.sale_date), db.Integer)
+    years = [year for (year,) in session.query(sale_year).filter(
+        Sale.sale_date < date(before_year, 1, 1)
+    ).distinct().order_by(sale_year)]
+    columns = [column.name for column in Sale.__table__.columns]
+
+    archived = []
+    for year in years:
+        first, after = year_bounds(year)
+        in_year = db.and_(Sale.sale_date >= first, Sale.sale_date < after)
+        row_count, quantity, first_sale, last_sale = session.execute(
+            select(db.func.count(), db.func.coalesce(db.func.sum(Sale.quantity_sold), 0),
+                   db.func.min(Sale.sale_date), db.func.max(Sale.sale_date)).where(in_year)
+        ).one()
+        if not row_count:
+            continue
+
+        table = archive_table(year)
+        table.create(session.connection(bind_arguments={'mapper': Sale}), checkfirst=True)
+        session.execute(table.insert().from_select(columns, select(*Sale.__table__.columns).where(in_year)))
+        session.execute(db.delete(Sale).where(in_year), execution_options={'synchronize_session': False})
+
+        # A year archived again (late, backdated sales) adds to its partition
+        partition = session.get(SalesPartition, year)
+        if partition is None:
+            partition = SalesPartition(year=year, table_name=table.name, row_count=0, total_quantity=0)
+            session.add(partition)
+        partition.row_count += row_count
+        partition.total_quantity += quantity
+        partition.first_sale_date = min(filter(None, (partition.first_sale_date, first_sale)))
+        partition.last_sale_date = max(filter(None, (partition.last_sale_date, last_sale)))
+        partition.archived_at = datetime.utcnow()
+        archived.append(partition)
+
+    if archived:
+        session.flush()
+        _reserve_archived_ids(session)
+        bump_versions(session, [Sale.__tablename__])
+    session.commit()
+    return archived
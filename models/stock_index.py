@@ -0,0 +1,151 @@
+"""
+In-process index of stock levels against per-product low-stock thresholds.
+
+Quantities and thresholds are kept in NumPy arrays indexed by product_id, and
+a sorted list of (quantity - threshold, product_id) ranks every product by how
+close it is to its threshold. Products below their threshold form a prefix of
+that list, so "what is low right now" costs O(log n + k).
+
+The write routes call update()/remove() after each commit. Other worker
+processes don't see those calls, so the index also reloads itself from the
+inventory table once it is older than STOCK_INDEX_REFRESH seconds.
+"""
+import bisect
+import threading
+import time
+
+import numpy as np
+
+from models.database import db, Inventory
+from models.tenancy import tenant_local
+
+DEFAULT_LOW_STOCK_THRESHOLD = 20
+
+
+class StockIndex:
+    """Stock levels and low-stock ranking keyed by product_id"""
+
+    def __init__(self, refresh_interval=30):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._quantities = np.zeros(0, dtype=np.int64)
+        self._thresholds = np.zeros(0, dtype=np.int64)
+        self._present = np.zeros(0, dtype=bool)
+        self._ranked = []
+        self._loaded_at = None
+
+    def load(self, session=None):
+        """Rebuild the index from the inventory table"""
+        session = session or db.session
+        rows = session.query(
+            Inventory.product_id, Inventory.stock_quantity, Inventory.low_stock_threshold
+        ).order_by(Inventory.inventory_id.desc()).all()
+
+        size = max((product_id for product_id, _, _ in rows), default=0) + 1
+        quantities = np.zeros(size, dtype=np.int64)
+        thresholds = np.zeros(size, dtype=np.int64)
+        present = np.zeros(size, dtype=bool)
+        # Descending order so the first inventory row per product wins
+        for product_id, quantity, threshold in rows:
+            quantities[product_id] = quantity
+            thresholds[product_id] = threshold
+            present[product_id] = True
+
+        product_ids = np.flatnonzero(present)
+        ranked = sorted(zip((quantities[product_ids] - thresholds[product_ids]).tolist(),
+                            product_ids.tolist()))
+        with self._lock:
+            self._quantities, self._thresholds, self._present = quantities, thresholds, present
+            self._ranked = ranked
+            self._loaded_at = time.monotonic()
+
+    def _maybe_refresh(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_interval:
+            self.load()
+
+    def _grow(self, product_id):
+        size = len(self._quantities)
+        if product_id < size:
+            return
+        extra = max(product_id + 1, size * 2) - size
+        self._quantities = np.concatenate([self._quantities, np.zeros(extra, dtype=np.int64)])
+        self._thresholds = np.concatenate([self._thresholds, np.zeros(extra, dtype=np.int64)])
+        self._present = np.concatenate([self._present, np.zeros(extra, dtype=bool)])
+
+    def _unrank(self, product_id):
+        if product_id < len(self._present) and self._present[product_id]:
+            entry = (int(self._quantities[product_id] - self._thresholds[product_id]), product_id)
+            position = bisect.bisect_left(self._ranked, entry)
+            if position < len(self._ranked) and self._ranked[position] == entry:
+                del self._ranked[position]
+
+    def update(self, product_id, quantity, threshold=None):
+        """Record a product's new stock level (and optionally its threshold)"""
+        with self._lock:
+            self._unrank(product_id)
+            self._grow(product_id)
+            if threshold is None:
+                threshold = self._thresholds[product_id] if self._present[product_id] \
+                    else DEFAULT_LOW_STOCK_THRESHOLD
+            self._quantities[product_id] = quantity
+            self._thresholds[product_id] = threshold
+            self._present[product_id] = True
+            bisect.insort(self._ranked, (int(quantity - threshold), product_id))
+
+    def remove(self, product_id):
+        """Forget a deleted product"""
+        with self._lock:
+            self._unrank(product_id)
+            if product_id < len(self._present):
+                self._present[product_id] = False
+
+    def low_stock_count(self):
+        """Number of products currently below their threshold"""
+        with self._lock:
+            self._maybe_refresh()
+            return bisect.bisect_left(self._ranked, (0,))
+
+    def low_stock(self, limit=None):
+        """Product ids below their threshold, furthest below first"""
+        with self._lock:
+            self._maybe_refresh()
+            end = bisect.bisect_left(self._ranked, (0,))
+            if limit is not None:
+                end = min(end, limit)
+            return [product_id for _, product_id in self._ranked[:end]]
+
+    def nearest_threshold(self, limit=10):
+        """Products closest to (or furthest below) their threshold"""
+        with self._lock:
+            self._maybe_refresh()
+            return [product_id for _, product_id in self._ranked[:limit]]
+
+    def is_low(self, product_id, refresh=True):
+        """Whether the product is below its threshold; refresh=False never reloads the index"""
+        with self._lock:
+            if refresh:
+                self._maybe_refresh()
+            return bool(product_id < len(self._present) and self._present[product_id]
+                        and self._quantities[product_id] < self._thresholds[product_id])
+
+    def threshold(self, product_id):
+        with self._lock:
+            self._maybe_refresh()
+            if product_id < len(self._present) and self._present[product_id]:
+                return int(self._thresholds[product_id])
+            return DEFAULT_LOW_STOCK_THRESHOLD
+
+
+# The primary database's index; tenants get their own, loaded on first use
+_primary_index = StockIndex()
+stock_index = tenant_local(_primary_index, lambda tenant: StockIndex(_primary_index.refresh_interval))
+
+
+def init_stock_index(app):
+    """Load the stock index for the app"""
+    app.config.setdefault('STOCK_INDEX_REFRESH', 30)
+    stock_index.refresh_interval = app.config['STOCK_INDEX_REFRESH']
+    with app.app_context():
+        stock_index.load()
+    app.extensions['stock_index'] = stock_index
+    return stock_index
@@ -0,0 +1,249 @@
+"""
+Per-tenant database routing.
+
+With TENANCY_ENABLED, every company gets its own SQLite file in TENANT_DB_DIR
+so one busy tenant's writes no longer lock the others out. Users (and their
+activity log) stay in the primary database; a logged-in user's company_name
+selects the tenant for the request, and TenantSession.get_bind sends every
+other table to that tenant's engine. Users without a company keep using the
+primary database, as does everything when tenancy is disabled (the default).
+
+Engines are created on first use and cached per tenant; engines idle for
+TENANT_ENGINE_IDLE seconds are disposed, and at most TENANT_ENGINE_MAX are
+kept open. Process-wide state (stock index, event bus, sales snapshot,
+analytics caches) is kept per tenant through TenantRegistry.
+
+A company's database is provisioned on its first request (or registration),
+and tenants can be provisioned and migrated with `flask tenants ...`.
+"""
+import os
+import re
+import threading
+import time
+
+from flask import abort, g, has_app_context
+from flask_login import current_user
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.util import find_tables
+from werkzeug.local import LocalProxy
+
+from models.database import db, TenantSession, User, Location, upgrade_schema
+from models.data_versions import seed_versions
+
+# Tables shared by all tenants, in the primary database
+GLOBAL_TABLES = {'users', 'activity_logs'}
+
+
+def tenant_key(company_name):
+    """Filesystem-safe tenant id for a company name"""
+    key = re.sub(r'[^a-z0-9]+', '-', (company_name or '').strip().lower()).strip('-')
+    return key or None
+
+
+def current_tenant():
+    """Tenant of the current request, or None for the primary database"""
+    return g.get('tenant') if has_app_context() else None
+
+
+def tenant_tables():
+    return [table for table in db.metadata.sorted_tables if table.name not in GLOBAL_TABLES]
+
+
+def _on_connect(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA busy_timeout=5000')
+    cursor.close()
+
+
+class TenantEngines:
+    """Cache of per-tenant engines with idle eviction"""
+
+    def __init__(self, directory=None, idle_timeout=300, max_engines=32):
+        self.directory = directory
+        self.idle_timeout = idle_timeout
+        self.max_engines = max_engines
+        self._engines = {}  # tenant -> [engine, last used]
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def path(self, tenant):
+        return os.path.join(self.directory, f'{tenant}.db')
+
+    def exists(self, tenant):
+        return os.path.exists(self.path(tenant))
+
+    def tenants(self):
+        """Every provisioned tenant"""
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-3] for name in os.listdir(self.directory) if name.endswith('.db'))
+
+    def get(self, tenant, create=False):
+        """The tenant's engine, opening it if needed"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._engines.get(tenant)
+            if entry is None:
+                if not create and not self.exists(tenant):
+                    raise LookupError(f'Tenant {tenant!r} has not been provisioned')
+                engine = create_engine(f'sqlite:///{self.path(tenant)}')
+                event.listen(engine, 'connect', _on_connect)
+                entry = self._engines[tenant] = [engine, now]
+            entry[1] = now
+            if now - self._last_sweep > self.idle_timeout / 2 or len(self._engines) > self.max_engines:
+                self._evict(now)
+            return entry[0]
+
+    def _evict(self, now):
+        self._last_sweep = now
+        by_age = sorted(self._engines.items(), key=lambda item: item[1][1])
+        excess = len(by_age) - self.max_engines
+        for position, (tenant, (engine, last_used)) in enumerate(by_age):
+            if position < excess or now - last_used > self.idle_timeout:
+                # Pooled connections close now; checked-out ones when returned
+                engine.dispose()
+                del self._engines[tenant]
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict(time.monotonic())
+
+    def open_count(self):
+        return len(self._engines)
+
+    def dispose_all(self):
+        with self._lock:
+            for engine, _ in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+
+
+tenant_engines = TenantEngines()
+_provision_lock = threading.Lock()
+_provisioned = set()  # tenants this process has seen fully provisioned
+
+
+def route_bind(mapper, clause):
+    """TenantSession hook: the tenant engine for tenant tables, else None"""
+    tenant = current_tenant()
+    if tenant is None:
+        return None
+    if mapper is not None:
+        tables = [db.inspect(mapper).local_table]
+    elif clause is not None:
+        tables = find_tables(clause, include_crud=True)
+    else:
+        tables = []
+    if tables and all(getattr(table, 'name', None) in GLOBAL_TABLES for table in tables):
+        return None
+    return tenant_engines.get(tenant)
+
+
+class TenantRegistry:
+    """One instance of a process-wide object per tenant"""
+
+    def __init__(self, default, factory):
+        self.default = default
+        self.factory = factory
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def get(self):
+        tenant = current_tenant()
+        if tenant is None:
+            return self.default
+        with self._lock:
+            instance = self._instances.get(tenant)
+            if instance is None:
+                instance = self._instances[tenant] = self.factory(tenant)
+            return instance
+
+
+def tenant_local(default, factory):
+    """Proxy to default, or to factory(tenant)'s instance while a tenant is active"""
+    registry = TenantRegistry(default, factory)
+    return LocalProxy(registry.get)
+
+
+def tenant_dir(tenant):
+    """Directory for a tenant's files other than its database"""
+    return os.path.join(tenant_engines.directory, tenant)
+
+
+def migrate_tenant(tenant, create=False):
+    """Create missing tables, columns and indexes in a tenant database"""
+    engine = tenant_engines.get(tenant, create=create)
+    db.metadata.create_all(engine, tables=tenant_tables())
+    upgrade_schema(engine)
+    seed_versions(engine)
+    return engine
+
+
+def provision_tenant(company_name):
+    """Create (or upgrade) a company's database with its default location"""
+    tenant = tenant_key(company_name)
+    if tenant is None:
+        raise ValueError('A company name is required')
+    os.makedirs(tenant_engines.directory, exist_ok=True)
+    engine = migrate_tenant(tenant, create=True)
+    with Session(engine) as session:
+        if session.query(Location).filter_by(is_default=True).first() is None:
+            session.add(Location(location_name='Main Warehouse', is_default=True))
+            session.commit()
+    return tenant
+
+
+def ensure_tenant(company_name):
+    """A company's tenant id, provisioning its database if it doesn't exist yet"""
+    tenant = tenant_key(company_name)
+    if tenant is None or tenant in _provisioned:
+        return tenant
+    # The file appears before its tables do, so other threads wait for the lock
+    with _provision_lock:
+        if not tenant_engines.exists(tenant):
+            provision_tenant(company_name)
+        _provisioned.add(tenant)
+    return tenant
+
+
+def migrate_all():
+    """Provision every user's company, then migrate every tenant; returns their ids"""
+    companies = db.session.query(User.company_name).filter(User.company_name.isnot(None)).distinct()
+    for (company_name,) in companies:
+        ensure_tenant(company_name)
+    tenants = tenant_engines.tenants()
+    for tenant in tenants:
+        migrate_tenant(tenant)
+    return tenants
+
+
+def select_tenant():
+    """before_request hook: route the request to the user's company database"""
+    if not current_user.is_authenticated:
+        return
+    try:
+        # Users may have registered with a company while tenancy was off
+        g.tenant = ensure_tenant(current_user.company_name)
+    except (SQLAlchemyError, OSError) as e:
+        abort(503, f'The database for {current_user.company_name!r} is unavailable: {e}')
+
+
+def init_tenancy(app):
+    """Route requests of users with a company to their tenant database"""
+    app.config.setdefault('TENANCY_ENABLED', False)
+    app.config.setdefault('TENANT_DB_DIR', os.path.join(app.instance_path, 'tenants'))
+    app.config.setdefault('TENANT_ENGINE_IDLE', 300)
+    app.config.setdefault('TENANT_ENGINE_MAX', 32)
+    tenant_engines.directory = app.config['TENANT_DB_DIR']
+    tenant_engines.idle_timeout = app.config['TENANT_ENGINE_IDLE']
+    tenant_engines.max_engines = app.config['TENANT_ENGINE_MAX']
+    app.extensions['tenancy'] = tenant_engines
+    if not app.config['TENANCY_ENABLED']:
+        return tenant_engines
+
+    TenantSession.route_bind = staticmethod(route_bind)
+    app.before_request(select_tenant)
+    return tenant_engines
@@ -0,0 +1,158 @@
+"""
+Incremental stock alerts.
+
+Rules are evaluated on write, only for the product whose stock just changed
+(stock_changed() in app.py calls evaluate_product), so finding the products
+in trouble never means scanning the catalog:
+
+- low_stock: stock below the product's low_stock_threshold
+- stockout_risk: stock lasts fewer than ALERT_STOCKOUT_DAYS days at the
+  average daily sales of the last ALERT_RATE_WINDOW days
+
+An alert is raised as soon as its rule is breached but only resolved once the
+value has recovered ALERT_HYSTERESIS (a fraction) past the limit, so stock
+hovering around a threshold doesn't flap. At most one alert per product and
+rule is active (a partial unique index enforces it across workers); repeat
+breaches update that alert, changing its severity if needed, rather than
+adding rows. New, escalated and resolved alerts are published on the event
+bus as 'alert' events.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from models.database import db, Alert, Inventory
+from models.sales_partitions import sales_source
+from services.events import event_bus
+
+# value/threshold are what the alert reports; breached raises it, recovered clears it
+Reading = namedtuple('Reading', 'value threshold severity breached recovered message')
+
+
+def daily_sales_rate(product_id, window):
+    """Average units sold per day over the last window days"""
+    since = datetime.utcnow().date() - timedelta(days=window - 1)
+    sales = sales_source(start=since)
+    sold = db.session.query(db.func.coalesce(db.func.sum(sales.c.quantity_sold), 0)).filter(
+        sales.c.product_id == product_id
+    ).scalar()
+    return sold / window
+
+
+def low_stock_rule(inventory, config):
+    quantity = inventory.stock_quantity
+    threshold = inventory.low_stock_threshold
+    name = inventory.product.product_name if inventory.product else f'Product {inventory.product_id}'
+    return Reading(
+        value=quantity,
+        threshold=threshold,
+        severity='critical' if quantity <= 0 else 'warning',
+        breached=quantity < threshold,
+        recovered=quantity >= threshold * (1 + config['ALERT_HYSTERESIS']),
+        message=f'{name}: {quantity} in stock, below the threshold of {threshold}'
+    )
+
+
+def stockout_risk_rule(inventory, config):
+    limit = config['ALERT_STOCKOUT_DAYS']
+    rate = daily_sales_rate(inventory.product_id, config['ALERT_RATE_WINDOW'])
+    if rate <= 0:
+        return Reading(None, limit, 'warning', breached=False, recovered=True, message=None)
+
+    days = max(inventory.stock_quantity, 0) / rate
+    name = inventory.product.product_name if inventory.product else f'Product {inventory.product_id}'
+    return Reading(
+        value=round(days, 1),
+        threshold=limit,
+        severity='critical' if days <= config['ALERT_CRITICAL_DAYS'] else 'warning',
+        breached=days < limit,
+        recovered=days >= limit * (1 + config['ALERT_HYSTERESIS']),
+        message=f'{name}: about {days:.1f} days of stock left at {rate:.1f} sold per day'
+    )
+
+
+RULES = {
+    'low_stock': low_stock_rule,
+    'stockout_risk': stockout_risk_rule,
+}
+
+
+def _apply(inventory, config, now):
+    """Raise, update or resolve the product's alerts; returns those worth publishing"""
+    active = {
+        alert.rule: alert
+        for alert in Alert.query.filter_by(product_id=inventory.product_id, status='active')
+    }
+    changed = []
+    for rule, check in RULES.items():
+        reading = check(inventory, config)
+        alert = active.get(rule)
+        if reading.breached:
+            if alert is None:
+                alert = Alert(product_id=inventory.product_id, rule=rule, severity=reading.severity,
+                              status='active', created_at=now)
+                db.session.add(alert)
+                changed.append(alert)
+            elif alert.severity != reading.severity:
+                alert.severity = reading.severity
+                changed.append(alert)
+            alert.value = reading.value
+            alert.threshold = reading.threshold
+            alert.message = reading.message
+            alert.updated_at = now
+        elif alert is not None:
+            # Inside the hysteresis band the alert stays active with its latest value
+            alert.value = reading.value
+            alert.updated_at = now
+            if reading.recovered:
+                alert.status = 'resolved'
+                alert.resolved_at = now
+                changed.append(alert)
+    return changed
+
+
+def evaluate_product(inventory):
+    """Evaluate every rule for one product after its stock was committed"""
+    config = current_app.config
+    if not config['ALERTS_ENABLED']:
+        return []
+    try:
+        changed = _apply(inventory, config, datetime.utcnow())
+        db.session.commit()
+    except IntegrityError:
+        # Another worker raised the same alert first
+        db.session.rollback()
+        return []
+    except SQLAlchemyError:
+        db.session.rollback()
+        current_app.logger.exception('Alert evaluation failed for product %s', inventory.product_id)
+        return []
+
+    for alert in changed:
+        event_bus.publish('alert', alert.to_dict())
+    return changed
+
+
+def evaluate_all():
+    """Evaluate every product once, e.g. to backfill alerts after enabling them"""
+    changed = []
+    seen = set()
+    for inventory in Inventory.query.order_by(Inventory.inventory_id).all():
+        if inventory.product_id in seen:
+            continue
+        seen.add(inventory.product_id)
+        changed.extend(evaluate_product(inventory))
+    return changed
+
+
+def init_alerts(app):
+    """Configure alert rules for the app"""
+    app.config.setdefault('ALERTS_ENABLED', True)
+    app.config.setdefault('ALERT_STOCKOUT_DAYS', 7)
+    app.config.setdefault('ALERT_CRITICAL_DAYS', 3)
+    app.config.setdefault('ALERT_RATE_WINDOW', 14)
+    app.config.setdefault('ALERT_HYSTERESIS', 0.2)
+    app.extensions['alerts'] = RULES
+    return RULES
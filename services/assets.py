@@ -0,0 +1,225 @@
+"""
+Static asset fingerprinting.
+
+`flask build-assets` minifies every CSS and JS file under static/ and writes
+it to static/dist/ with a content hash in its name, plus a manifest.json that
+maps each source path to its built file:
+
+    {"js/main.js": "dist/js/main.3f2a9c0d81be.js", ...}
+
+Once a manifest exists, url_for('static', filename='js/main.js') resolves to
+the fingerprinted file and responses for static/dist/ are sent with a one
+year, immutable Cache-Control, so browsers never revalidate them; a changed
+file gets a new name. Without a build the source files are served as before.
+Re-run the build after editing anything under static/.
+
+The minifiers are deliberately conservative: they drop comments and
+collapse whitespace but keep line breaks in JavaScript, so automatic
+semicolon insertion behaves exactly as in the source.
+"""
+import hashlib
+import json
+import os
+import re
+
+from flask import request
+
+MANIFEST = 'manifest.json'
+
+_CSS_TOKENS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|(/\*.*?\*/)|([^"\'/]+|/)', re.S)
+_REGEX_PREFIX = re.compile(r'(?:^|[^\w$])(?:return|typeof|case|do|else|in|of|new|delete|void|throw|yield|await)$')
+
+
+def minify_css(source):
+    """Strip comments and redundant whitespace, leaving quoted strings alone"""
+    strings, parts = [], []
+    for string, comment, code in _CSS_TOKENS.findall(source):
+        if string:
+            parts.append(f'\0{len(strings)}\0')
+            strings.append(string)
+        elif code:
+            parts.append(code)
+    css = re.sub(r'\s+', ' ', ''.join(parts))
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css).replace(';}', '}').strip()
+    return re.sub(r'\0(\d+)\0', lambda m: strings[int(m.group(1))], css)
+
+
+def _skip_quoted(source, i, quote):
+    """Index just past the string literal starting at i"""
+    j = i + 1
+    while j < len(source) and source[j] != quote:
+        j += 2 if source[j] == '\\' else 1
+    return j + 1
+
+
+def _skip_regex(source, i):
+    """Index just past the regular expression literal (and flags) starting at i"""
+    j, in_class = i + 1, False
+    while j < len(source) and source[j] != '\n':
+        c = source[j]
+        if c == '\\':
+            j += 2
+            continue
+        if c == '[':
+            in_class = True
+        elif c == ']':
+            in_class = False
+        elif c == '/' and not in_class:
+            break
+        j += 1
+    j += 1
+    while j < len(source) and (source[j].isalnum() or source[j] == '_'):
+        j += 1
+    return j
+
+
+def _regex_allowed(code):
+    """Whether a '/' after the code emitted so far starts a regex rather than a division"""
+    code = code.rstrip()
+    return not code or code[-1] in '(,=:[!&|?{};+-*%<>~^' or bool(_REGEX_PREFIX.search(code))
+
+
+def _whitespace(out, newline):
+    """Collapse a run of whitespace to one space or one line break"""
+    if out and out[-1] == ' ' and newline:
+        out.pop()
+    if out and out[-1] not in (' ', '\n'):
+        out.append('\n' if newline else ' ')
+
+
+def minify_js(source):
+    """Strip comments, indentation and blank lines outside of literals"""
+    out = []
+    templates = []  # brace depth inside each open ${...} substitution
+    i, n = 0, len(source)
+    while i < n:
+        c = source[i]
+        if c == '`' or (c == '}' and templates and templates[-1] == 0):
+            # Template literal text, up to its end or the next ${
+            if c == '}':
+                templates.pop()
+            j = i + 1
+            while j < n:
+                if source[j] == '\\':
+                    j += 2
+                elif source[j] == '`':
+                    j += 1
+                    break
+                elif source.startswith('${', j):
+                    j += 2
+                    templates.append(0)
+                    break
+                else:
+                    j += 1
+            out.append(source[i:j])
+            i = j
+        elif c in '"\'':
+            j = _skip_quoted(source, i, c)
+            out.append(source[i:j])
+            i = j
+        elif source.startswith('//', i):
+            i = source.find('\n', i)
+            i = n if i < 0 else i
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            _whitespace(out, '\n' in source[i:end])
+            i = n if end < 0 else end + 2
+        elif c == '/' and _regex_allowed(''.join(out[-8:])):
+            j = _skip_regex(source, i)
+            out.append(source[i:j])
+            i = j
+        elif c.isspace():
+            j = i
+            while j < n and source[j].isspace():
+                j += 1
+            _whitespace(out, '\n' in source[i:j])
+            i = j
+        else:
+            if templates and c == '{':
+                templates[-1] += 1
+            elif templates and c == '}':
+                templates[-1] -= 1
+            out.append(c)
+            i += 1
+    return ''.join(out).strip() + '\n'
+
+
+MINIFIERS = {
+    '.css': minify_css,
+    '.js': minify_js,
+}
+
+
+def build_assets(static_folder, dist='dist'):
+    """Minify and fingerprint static CSS/JS into static_folder/dist; returns the manifest"""
+    out_dir = os.path.join(static_folder, dist)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    previous = _read_manifest(manifest_path)
+    manifest = {}
+
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != out_dir)
+        for name in sorted(files):
+            extension = os.path.splitext(name)[1]
+            if extension not in MINIFIERS:
+                continue
+            path = os.path.join(root, name)
+            source_name = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            with open(path, encoding='utf-8') as f:
+                content = MINIFIERS[extension](f.read()).encode('utf-8')
+
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            built_name = f'{source_name[:-len(extension)]}.{digest}{extension}'
+            target = os.path.join(out_dir, built_name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(content)
+            manifest[source_name] = f'{dist}/{built_name}'
+
+    # Keep the previous build too, for pages rendered before the deploy
+    keep = {os.path.normpath(os.path.join(static_folder, p)) for p in (*manifest.values(), *previous.values())}
+    for root, dirs, files in os.walk(out_dir):
+        for name in files:
+            path = os.path.normpath(os.path.join(root, name))
+            if name != MANIFEST and path not in keep:
+                os.remove(path)
+
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return manifest
+
+
+def _read_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def init_assets(app):
+    """Resolve static URLs to fingerprinted files and cache those for good"""
+    app.config.setdefault('ASSETS_DIST', 'dist')
+    app.config.setdefault('ASSETS_MAX_AGE', 365 * 24 * 3600)
+    dist = app.config['ASSETS_DIST']
+    manifest = _read_manifest(os.path.join(app.static_folder, dist, MANIFEST))
+
+    @app.url_defaults
+    def fingerprint_static(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = manifest[values['filename']]
+
+    @app.after_request
+    def cache_fingerprinted(response):
+        if (request.endpoint == 'static' and response.status_code in (200, 304)
+                and request.view_args.get('filename', '').startswith(dist + '/')):
+            response.cache_control.public = True
+            response.cache_control.max_age = app.config['ASSETS_MAX_AGE']
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        return response
+
+    app.extensions['assets'] = manifest
+    return manifest
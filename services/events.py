@@ -0,0 +1,105 @@
+"""
+In-process publish/subscribe for live stock and sales updates.
+
+Write routes publish small delta events after they commit; each connected
+/api/stream client owns a bounded queue that publish() fans out to. A slow
+client never blocks writers: when its queue is full the oldest event is
+dropped. The last REPLAY_SIZE events are kept so a reconnecting EventSource
+can resume from its Last-Event-ID.
+
+Events only reach clients connected to the same process, and with tenancy
+enabled only clients of the same tenant.
+"""
+import itertools
+import json
+import queue
+import threading
+from collections import deque
+
+from models.tenancy import tenant_local
+
+REPLAY_SIZE = 256
+
+
+class Event:
+    """One server-sent event"""
+
+    __slots__ = ('event_id', 'event_type', 'data')
+
+    def __init__(self, event_id, event_type, data):
+        self.event_id = event_id
+        self.event_type = event_type
+        self.data = data
+
+    def encode(self):
+        """SSE wire format"""
+        return f'id: {self.event_id}\nevent: {self.event_type}\ndata: {json.dumps(self.data)}\n\n'
+
+
+class Subscription:
+    """A client's bounded queue of pending events"""
+
+    def __init__(self, max_queue):
+        self._queue = queue.Queue(maxsize=max_queue)
+
+    def put(self, event):
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Next event, or None if nothing arrived within timeout"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    """Fan-out of published events to every subscription"""
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self._recent = deque(maxlen=REPLAY_SIZE)
+        self._ids = itertools.count(1)
+
+    def subscribe(self, last_event_id=None):
+        """Register a client, replaying events it missed since last_event_id"""
+        subscription = Subscription(self.max_queue)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._recent:
+                    if event.event_id > last_event_id:
+                        subscription.put(event)
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event_type, data):
+        """Send an event to all current subscribers"""
+        with self._lock:
+            event = Event(next(self._ids), event_type, data)
+            self._recent.append(event)
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.put(event)
+        return event
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+
+event_bus = tenant_local(EventBus(), lambda tenant: EventBus())
@@ -0,0 +1,166 @@
+"""
+Jinja fragment caching.
+
+A {% cache %} block renders once and is then served from memory until the
+data behind it changes:
+
+    {% cache 'low_stock_list', ['inventory', 'products'] %}
+        ... expensive markup ...
+    {% endcache %}
+
+The first argument names the fragment, the second lists the tables it is
+built from; their data versions (models/data_versions.py) are part of the
+key, so any committed write to those tables renders it afresh. Further
+arguments are added to the key as well, for fragments that vary by user or
+request parameters, and so is the current tenant. Entries are kept in an LRU bounded by
+FRAGMENT_CACHE_MAX_BYTES of rendered markup, per process.
+
+Fragments rendered from analytics_session() data end with analytics=True:
+
+    {% cache 'dashboard_stats', ['products', 'sales'], analytics=True %}
+
+Their key then also holds the versions the analytics session sees, so a
+fragment rendered from a lagging snapshot or replica is rendered again once
+that copy catches up, rather than being kept under the primary's versions.
+
+Views can pass deferred(...) results so that their queries only run when a
+fragment actually has to be rendered.
+"""
+import threading
+from collections import OrderedDict
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from models.data_versions import data_versions
+from models.read_routing import analytics_session
+from models.tenancy import current_tenant
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered fragments, bounded by total size in bytes"""
+
+    def __init__(self, max_bytes=4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        return {'entries': len(self._entries), 'bytes': self.size, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses}
+
+
+class FragmentCacheExtension(Extension):
+    """{% cache name, tables[, vary...][, analytics=True] %}...{% endcache %}"""
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        kwargs = []
+        while parser.stream.skip_if('comma'):
+            if parser.stream.current.type == 'name' and parser.stream.look().type == 'assign':
+                key = next(parser.stream).value
+                parser.stream.skip()
+                kwargs.append(nodes.Keyword(key, parser.parse_expression(), lineno=lineno))
+            else:
+                args.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_render', [nodes.List(args)], kwargs)
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, args, caller, analytics=False):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        name, tables, *vary = args
+        versions = tuple(sorted(data_versions(*tables).items()))
+        if analytics:
+            versions += tuple(sorted(data_versions(*tables, session=analytics_session()).items()))
+        key = (current_tenant(), name, versions, tuple(repr(value) for value in vary))
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = Markup(caller())
+            cache.set(key, fragment)
+        return fragment
+
+
+class deferred:
+    """A query result computed on first use, so cached fragments skip it"""
+
+    def __init__(self, func):
+        self._func = func
+        self._value = None
+        self._loaded = False
+
+    def _get(self):
+        if not self._loaded:
+            self._value = self._func()
+            self._loaded = True
+        return self._value
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __len__(self):
+        return len(self._get())
+
+    def __bool__(self):
+        return bool(self._get())
+
+    def __str__(self):
+        return str(self._get())
+
+    def __html__(self):
+        return Markup.escape(self._get())
+
+
+def init_fragment_cache(app):
+    """Enable {% cache %} blocks in the app's templates"""
+    app.config.setdefault('FRAGMENT_CACHE_ENABLED', True)
+    app.config.setdefault('FRAGMENT_CACHE_MAX_BYTES', 4 * 1024 * 1024)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    cache = None
+    if app.config['FRAGMENT_CACHE_ENABLED']:
+        cache = FragmentCache(app.config['FRAGMENT_CACHE_MAX_BYTES'])
+    app.jinja_env.fragment_cache = cache
+    app.extensions['fragment_cache'] = cache
+    return cache
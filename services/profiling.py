@@ -0,0 +1,163 @@
+"""
+Opt-in request profiling.
+
+With PROFILE_ENABLED set, a sampled fraction of requests (PROFILE_SAMPLE_RATE)
+matching PROFILE_ROUTES (endpoint names or path prefixes; empty means every
+route) is profiled. A request can also be profiled on demand by sending the
+PROFILE_HEADER header with the value of PROFILE_TOKEN:
+
+    curl -H 'X-Profile: <token>' http://localhost:5000/api/predict
+
+PROFILE_MODE picks the profiler:
+
+- 'cprofile' writes <PROFILE_DIR>/<time>-<endpoint>.pstats
+  (python -m pstats file, or snakeviz)
+- 'sample' polls the request thread's stack every PROFILE_SAMPLE_INTERVAL
+  seconds and writes folded stacks to <time>-<endpoint>.collapsed, the input
+  format of flamegraph.pl and speedscope
+
+When disabled no request hooks are registered, so there is no overhead. One
+request is profiled at a time per process; others are skipped rather than
+waiting.
+"""
+import cProfile
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request
+
+_active = threading.Lock()
+
+
+class StackSampler:
+    """Samples one thread's Python stack from a background thread"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+class CProfiler:
+    """cProfile for the duration of one request"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def dump(self, path):
+        self.profile.dump_stats(path)
+
+
+def _route_selected(routes):
+    if not routes:
+        return True
+    return any(route == request.endpoint or request.path.startswith(route) for route in routes)
+
+
+def _requested(config):
+    """Profiling forced with the secret header"""
+    token = config['PROFILE_TOKEN']
+    value = request.headers.get(config['PROFILE_HEADER'])
+    return bool(token and value and hmac.compare_digest(value, token))
+
+
+def _filename(extension):
+    endpoint = (request.endpoint or 'unknown').replace('.', '_')
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{request.method}-{endpoint}.{extension}"
+
+
+def init_profiling(app):
+    """Register request profiling hooks if PROFILE_ENABLED is set"""
+    app.config.setdefault('PROFILE_ENABLED', False)
+    app.config.setdefault('PROFILE_SAMPLE_RATE', 0.01)
+    app.config.setdefault('PROFILE_ROUTES', [])
+    app.config.setdefault('PROFILE_MODE', 'cprofile')
+    app.config.setdefault('PROFILE_SAMPLE_INTERVAL', 0.005)
+    app.config.setdefault('PROFILE_HEADER', 'X-Profile')
+    app.config.setdefault('PROFILE_TOKEN', None)
+    app.config.setdefault('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+    if not app.config['PROFILE_ENABLED']:
+        return None
+
+    config = app.config
+    if config['PROFILE_MODE'] not in ('cprofile', 'sample'):
+        raise ValueError(f"PROFILE_MODE must be 'cprofile' or 'sample', not {config['PROFILE_MODE']!r}")
+    os.makedirs(config['PROFILE_DIR'], exist_ok=True)
+
+    @app.before_request
+    def start_profile():
+        if not _route_selected(config['PROFILE_ROUTES']):
+            return
+        if not _requested(config) and random.random() >= config['PROFILE_SAMPLE_RATE']:
+            return
+        if not _active.acquire(blocking=False):
+            return
+
+        if config['PROFILE_MODE'] == 'sample':
+            profiler = StackSampler(threading.get_ident(), config['PROFILE_SAMPLE_INTERVAL'])
+        else:
+            profiler = CProfiler()
+        try:
+            profiler.start()
+        except ValueError:
+            # Another profiler (e.g. a debugger) is already attached
+            _active.release()
+            return
+        g._profiler = (profiler, time.perf_counter())
+
+    @app.teardown_request
+    def stop_profile(exc):
+        active = g.pop('_profiler', None)
+        if active is None:
+            return
+        profiler, started = active
+        try:
+            profiler.stop()
+            extension = 'collapsed' if isinstance(profiler, StackSampler) else 'pstats'
+            path = os.path.join(config['PROFILE_DIR'], _filename(extension))
+            profiler.dump(path)
+            app.logger.info('Profiled %s %s in %.1f ms: %s', request.method, request.path,
+                            (time.perf_counter() - started) * 1000, path)
+        finally:
+            _active.release()
+
+    app.extensions['profiling'] = config['PROFILE_DIR']
+    return config['PROFILE_DIR']
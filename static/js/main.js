@@ -173,6 +173,37 @@ function filterTable(inputId, tableId) {
     }
 }
 
+// Live updates: open the /api/stream Server-Sent Events feed and dispatch
+// each event type ('stock', 'sale', 'sale_deleted', 'low_stock') to a handler
+function subscribeToStream(handlers) {
+    if (typeof EventSource === 'undefined') {
+        return null;
+    }
+    const source = new EventSource('/api/stream');
+    Object.keys(handlers).forEach(eventType => {
+        source.addEventListener(eventType, function(e) {
+            handlers[eventType](JSON.parse(e.data));
+        });
+    });
+    return source;
+}
+
+// Non-blocking banner for pushed alerts
+function showLiveAlert(message) {
+    const main = document.querySelector('main');
+    if (!main) return;
+    const alertDiv = document.createElement('div');
+    alertDiv.className = 'alert alert-warning alert-dismissible fade show';
+    alertDiv.setAttribute('role', 'alert');
+    alertDiv.textContent = message;
+    const closeButton = document.createElement('button');
+    closeButton.type = 'button';
+    closeButton.className = 'btn-close';
+    closeButton.setAttribute('data-bs-dismiss', 'alert');
+    alertDiv.appendChild(closeButton);
+    main.prepend(alertDiv);
+}
+
 // Global error handler
 window.addEventListener('error', function(e) {
     console.error('Global error:', e.error);
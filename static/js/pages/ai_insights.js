@@ -0,0 +1,145 @@
+let salesTrendChart = null;
+let categorySalesChart = null;
+
+// Load AI Predictions
+function loadPredictions() {
+    fetch('/api/predict')
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                displayPredictions(data.predictions, data.timestamp);
+            } else {
+                alert('Error loading predictions: ' + data.error);
+            }
+        })
+        .catch(error => alert('Error: ' + error));
+}
+
+function displayPredictions(predictions, timestamp) {
+    document.getElementById('predictionResults').style.display = 'block';
+    document.getElementById('predictionTimestamp').textContent = 'Last updated: ' + timestamp;
+
+    const tbody = document.getElementById('predictionsTableBody');
+    tbody.innerHTML = '';
+
+    predictions.forEach(pred => {
+        const row = document.createElement('tr');
+
+        // Determine row class based on status
+        if (pred.status.includes('Critical')) {
+            row.className = 'table-danger';
+        } else if (pred.status.includes('Warning') || pred.status.includes('Low')) {
+            row.className = 'table-warning';
+        }
+
+        row.innerHTML = `
+            <td><strong>${pred.product_name}</strong></td>
+            <td><span class="badge bg-secondary">${pred.category}</span></td>
+            <td>${pred.current_stock}</td>
+            <td>${pred.predicted_sales}</td>
+            <td>${pred.days_until_stockout}</td>
+            <td><span class="badge bg-${pred.confidence === 'High' ? 'success' : pred.confidence === 'Medium' ? 'warning' : 'secondary'}">${pred.confidence}</span></td>
+            <td>${pred.status}</td>
+        `;
+
+        tbody.appendChild(row);
+    });
+}
+
+// Load Sales Trend Chart
+function loadSalesTrendChart() {
+    fetch('/api/sales-trend')
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                const ctx = document.getElementById('salesTrendChart').getContext('2d');
+
+                if (salesTrendChart) {
+                    salesTrendChart.destroy();
+                }
+
+                salesTrendChart = new Chart(ctx, {
+                    type: 'line',
+                    data: {
+                        labels: data.dates,
+                        datasets: [{
+                            label: 'Units Sold',
+                            data: data.quantities,
+                            borderColor: 'rgb(75, 192, 192)',
+                            backgroundColor: 'rgba(75, 192, 192, 0.2)',
+                            tension: 0.3,
+                            fill: true
+                        }]
+                    },
+                    options: {
+                        responsive: true,
+                        maintainAspectRatio: true,
+                        plugins: {
+                            legend: {
+                                display: true,
+                                position: 'top'
+                            },
+                            title: {
+                                display: false
+                            }
+                        },
+                        scales: {
+                            y: {
+                                beginAtZero: true
+                            }
+                        }
+                    }
+                });
+            }
+        });
+}
+
+// Load Category Sales Chart
+function loadCategorySalesChart() {
+    fetch('/api/category-sales')
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                const ctx = document.getElementById('categorySalesChart').getContext('2d');
+
+                if (categorySalesChart) {
+                    categorySalesChart.destroy();
+                }
+
+                const colors = [
+                    'rgba(255, 99, 132, 0.8)',
+                    'rgba(54, 162, 235, 0.8)',
+                    'rgba(255, 206, 86, 0.8)',
+                    'rgba(75, 192, 192, 0.8)',
+                    'rgba(153, 102, 255, 0.8)'
+                ];
+
+                categorySalesChart = new Chart(ctx, {
+                    type: 'doughnut',
+                    data: {
+                        labels: data.categories,
+                        datasets: [{
+                            data: data.sales,
+                            backgroundColor: colors,
+                            borderWidth: 2
+                        }]
+                    },
+                    options: {
+                        responsive: true,
+                        maintainAspectRatio: true,
+                        plugins: {
+                            legend: {
+                                position: 'bottom'
+                            }
+                        }
+                    }
+                });
+            }
+        });
+}
+
+// Load charts on page load
+document.addEventListener('DOMContentLoaded', function() {
+    loadSalesTrendChart();
+    loadCategorySalesChart();
+});
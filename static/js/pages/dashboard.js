@@ -0,0 +1,16 @@
+// Keep the summary cards current from the live update stream
+function adjustTotalSales(delta) {
+    const counter = document.getElementById('totalSalesCount');
+    counter.textContent = parseInt(counter.textContent) + delta;
+}
+
+subscribeToStream({
+    sale: sale => adjustTotalSales(sale.quantity_sold),
+    sale_deleted: deleted => adjustTotalSales(-deleted.quantity_sold),
+    stock: update => document.getElementById('lowStockCount').textContent = update.low_stock_count,
+    low_stock: alert => showLiveAlert(`Low stock: ${alert.product_name} has ${alert.stock_quantity} units left`),
+    // low_stock is announced above; only stockout forecasts need their own banner
+    alert: alert => {
+        if (alert.status === 'active' && alert.rule === 'stockout_risk') showLiveAlert(alert.message);
+    }
+});
@@ -0,0 +1,55 @@
+function editInventory(inventoryId, productName, stockQuantity, restockDate) {
+    document.getElementById('inventoryId').value = inventoryId;
+    document.getElementById('productNameDisplay').value = productName;
+    document.getElementById('stockQuantity').value = stockQuantity;
+    document.getElementById('restockDate').value = restockDate;
+    new bootstrap.Modal(document.getElementById('inventoryModal')).show();
+}
+
+function saveInventory() {
+    const inventoryId = document.getElementById('inventoryId').value;
+    const data = {
+        stock_quantity: parseInt(document.getElementById('stockQuantity').value),
+        restock_date: document.getElementById('restockDate').value
+    };
+
+    fetch(`/api/inventory/${inventoryId}`, {
+        method: 'PUT',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify(data)
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.success) {
+            alert('Inventory updated successfully!');
+            location.reload();
+        } else {
+            alert('Error: ' + result.error);
+        }
+    });
+}
+
+// Apply pushed stock changes to the matching row in place
+function applyStockUpdate(update) {
+    const row = document.querySelector(`tr[data-product-id="${update.product_id}"]`);
+    if (!row) return;
+    const threshold = update.low_stock_threshold;
+    row.dataset.threshold = threshold;
+    row.querySelector('.stock-quantity').textContent = update.stock_quantity;
+
+    let rowClass = '', badge = '<span class="badge bg-success">Healthy</span>';
+    if (update.stock_quantity < Math.floor(threshold / 2)) {
+        rowClass = 'table-danger';
+        badge = '<span class="badge bg-danger">Critical</span>';
+    } else if (update.stock_quantity < threshold) {
+        rowClass = 'table-warning';
+        badge = '<span class="badge bg-warning">Low</span>';
+    }
+    row.className = rowClass;
+    row.querySelector('.stock-status').innerHTML = badge;
+}
+
+subscribeToStream({
+    stock: applyStockUpdate,
+    low_stock: alert => showLiveAlert(`Low stock: ${alert.product_name} has ${alert.stock_quantity} units left`)
+});
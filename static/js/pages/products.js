@@ -0,0 +1,69 @@
+function resetProductForm() {
+    document.getElementById('productForm').reset();
+    document.getElementById('productId').value = '';
+    document.getElementById('productModalTitle').textContent = 'Add New Product';
+    document.getElementById('initialStockDiv').style.display = 'block';
+}
+
+function editProduct(productId) {
+    fetch(`/api/products/${productId}`)
+        .then(response => response.json())
+        .then(data => {
+            document.getElementById('productId').value = data.product_id;
+            document.getElementById('productName').value = data.product_name;
+            document.getElementById('category').value = data.category;
+            document.getElementById('price').value = data.price;
+            document.getElementById('productModalTitle').textContent = 'Edit Product';
+            document.getElementById('initialStockDiv').style.display = 'none';
+            new bootstrap.Modal(document.getElementById('productModal')).show();
+        })
+        .catch(error => alert('Error loading product: ' + error));
+}
+
+function saveProduct() {
+    const productId = document.getElementById('productId').value;
+    const data = {
+        product_name: document.getElementById('productName').value,
+        category: document.getElementById('category').value,
+        price: parseFloat(document.getElementById('price').value)
+    };
+
+    if (!productId) {
+        data.initial_stock = parseInt(document.getElementById('initialStock').value) || 0;
+    }
+
+    const url = productId ? `/api/products/${productId}` : '/api/products';
+    const method = productId ? 'PUT' : 'POST';
+
+    fetch(url, {
+        method: method,
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify(data)
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.success) {
+            alert('Product saved successfully!');
+            location.reload();
+        } else {
+            alert('Error: ' + result.error);
+        }
+    })
+    .catch(error => alert('Error saving product: ' + error));
+}
+
+function deleteProduct(productId) {
+    if (confirm('Are you sure you want to delete this product?')) {
+        fetch(`/api/products/${productId}`, {method: 'DELETE'})
+            .then(response => response.json())
+            .then(result => {
+                if (result.success) {
+                    alert('Product deleted successfully!');
+                    location.reload();
+                } else {
+                    alert('Error: ' + result.error);
+                }
+            })
+            .catch(error => alert('Error deleting product: ' + error));
+    }
+}
@@ -0,0 +1,55 @@
+// Password strength indicator
+document.getElementById('password').addEventListener('input', function(e) {
+    const password = e.target.value;
+    const strengthBar = document.getElementById('passwordStrength');
+
+    let strength = 0;
+    if (password.length >= 6) strength++;
+    if (password.length >= 10) strength++;
+    if (/[a-z]/.test(password) && /[A-Z]/.test(password)) strength++;
+    if (/\d/.test(password)) strength++;
+    if (/[^a-zA-Z\d]/.test(password)) strength++;
+
+    const colors = ['#dc3545', '#ffc107', '#28a745'];
+    const widths = ['33%', '66%', '100%'];
+
+    if (strength <= 2) {
+        strengthBar.style.backgroundColor = colors[0];
+        strengthBar.style.width = widths[0];
+    } else if (strength <= 3) {
+        strengthBar.style.backgroundColor = colors[1];
+        strengthBar.style.width = widths[1];
+    } else {
+        strengthBar.style.backgroundColor = colors[2];
+        strengthBar.style.width = widths[2];
+    }
+});
+
+// Password match validator
+document.getElementById('confirm_password').addEventListener('input', function(e) {
+    const password = document.getElementById('password').value;
+    const confirmPassword = e.target.value;
+    const matchText = document.getElementById('passwordMatch');
+
+    if (confirmPassword.length === 0) {
+        matchText.textContent = '';
+        matchText.className = 'text-muted';
+    } else if (password === confirmPassword) {
+        matchText.textContent = '✓ Passwords match';
+        matchText.className = 'text-success';
+    } else {
+        matchText.textContent = '✗ Passwords do not match';
+        matchText.className = 'text-danger';
+    }
+});
+
+// Form validation
+document.getElementById('registerForm').addEventListener('submit', function(e) {
+    const password = document.getElementById('password').value;
+    const confirmPassword = document.getElementById('confirm_password').value;
+
+    if (password !== confirmPassword) {
+        e.preventDefault();
+        alert('Passwords do not match!');
+    }
+});
@@ -0,0 +1,71 @@
+function resetSaleForm() {
+    document.getElementById('saleForm').reset();
+    document.getElementById('saleDate').value = new Date().toISOString().split('T')[0];
+}
+
+function saveSale() {
+    const data = {
+        product_id: parseInt(document.getElementById('productId').value),
+        quantity_sold: parseInt(document.getElementById('quantitySold').value),
+        sale_date: document.getElementById('saleDate').value
+    };
+
+    fetch('/api/sales', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify(data)
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.success) {
+            alert('Sale recorded successfully! Inventory updated.');
+            location.reload();
+        } else {
+            alert('Error: ' + result.error);
+        }
+    })
+    .catch(error => alert('Error recording sale: ' + error));
+}
+
+function deleteSale(saleId) {
+    if (confirm('Are you sure you want to delete this sale? Inventory will be restored.')) {
+        fetch(`/api/sales/${saleId}`, {method: 'DELETE'})
+            .then(response => response.json())
+            .then(result => {
+                if (result.success) {
+                    alert('Sale deleted and inventory restored!');
+                    location.reload();
+                } else {
+                    alert('Error: ' + result.error);
+                }
+            });
+    }
+}
+
+// Prepend sales recorded elsewhere and drop deleted ones without reloading
+function addSaleRow(sale) {
+    // Archived years never receive new sales
+    if (document.getElementById('salesTableBody').dataset.archived) return;
+    if (document.querySelector(`tr[data-sale-id="${sale.sale_id}"]`)) return;
+    const row = document.createElement('tr');
+    row.dataset.saleId = sale.sale_id;
+    [sale.sale_id, sale.product_name, sale.quantity_sold, sale.sale_date].forEach(value => {
+        const cell = document.createElement('td');
+        cell.textContent = value;
+        row.appendChild(cell);
+    });
+    const actions = document.createElement('td');
+    actions.innerHTML = `<button class="btn btn-sm btn-danger" onclick="deleteSale(${sale.sale_id})"><i class="bi bi-trash"></i></button>`;
+    row.appendChild(actions);
+    document.getElementById('salesTableBody').prepend(row);
+}
+
+function removeSaleRow(deleted) {
+    const row = document.querySelector(`tr[data-sale-id="${deleted.sale_id}"]`);
+    if (row) row.remove();
+}
+
+subscribeToStream({
+    sale: addSaleRow,
+    sale_deleted: removeSaleRow
+});
@@ -0,0 +1,58 @@
+function resetSupplierForm() {
+    document.getElementById('supplierForm').reset();
+    document.getElementById('supplierId').value = '';
+    document.getElementById('supplierModalTitle').textContent = 'Add New Supplier';
+}
+
+function editSupplier(supplierId) {
+    fetch(`/api/suppliers/${supplierId}`)
+        .then(response => response.json())
+        .then(data => {
+            document.getElementById('supplierId').value = data.supplier_id;
+            document.getElementById('supplierName').value = data.supplier_name;
+            document.getElementById('contactInfo').value = data.contact_info;
+            document.getElementById('supplierModalTitle').textContent = 'Edit Supplier';
+            new bootstrap.Modal(document.getElementById('supplierModal')).show();
+        });
+}
+
+function saveSupplier() {
+    const supplierId = document.getElementById('supplierId').value;
+    const data = {
+        supplier_name: document.getElementById('supplierName').value,
+        contact_info: document.getElementById('contactInfo').value
+    };
+
+    const url = supplierId ? `/api/suppliers/${supplierId}` : '/api/suppliers';
+    const method = supplierId ? 'PUT' : 'POST';
+
+    fetch(url, {
+        method: method,
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify(data)
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.success) {
+            alert('Supplier saved successfully!');
+            location.reload();
+        } else {
+            alert('Error: ' + result.error);
+        }
+    });
+}
+
+function deleteSupplier(supplierId) {
+    if (confirm('Are you sure you want to delete this supplier?')) {
+        fetch(`/api/suppliers/${supplierId}`, {method: 'DELETE'})
+            .then(response => response.json())
+            .then(result => {
+                if (result.success) {
+                    alert('Supplier deleted successfully!');
+                    location.reload();
+                } else {
+                    alert('Error: ' + result.error);
+                }
+            });
+    }
+}
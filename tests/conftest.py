@@ -0,0 +1,50 @@
+"""
+Shared fixtures. The app is imported once, against a throwaway instance
+folder, so the tests never touch instance/inventory.db.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+os.environ.setdefault('INVENTORY_INSTANCE_PATH', tempfile.mkdtemp(prefix='inventory-tests-'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app  # noqa: E402
+from ai.singleflight import analytics_flight  # noqa: E402
+
+
+def sell(client, product_id, quantity, sale_date=None):
+    """Record a sale through the API (today unless sale_date is given); returns its id"""
+    payload = {'product_id': product_id, 'quantity_sold': quantity}
+    if sale_date:
+        payload['sale_date'] = sale_date
+    response = client.post('/api/sales', json=payload)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['sale']['sale_id']
+
+
+@pytest.fixture
+def app():
+    flask_app.config['TESTING'] = True
+    analytics_flight.invalidate()
+    yield flask_app
+    analytics_flight.invalidate()
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    response = client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def product_id(client):
+    """A fresh product with stock to sell"""
+    response = client.post('/api/products', json={'product_name': 'Test Widget', 'category': 'Test',
+                                                  'price': 2.5, 'initial_stock': 500})
+    assert response.status_code == 201
+    return response.get_json()['product']['product_id']
@@ -0,0 +1,46 @@
+import re
+
+import pytest
+
+from models.database import db, Product
+from models.read_routing import router, read_session, _readonly_engine
+
+
+@pytest.fixture
+def snapshot_mode(app, tmp_path):
+    """Route analytics reads to a snapshot that only refreshes when told to"""
+    saved = {name: getattr(router, name)
+             for name in ('mode', 'engine', 'snapshot_path', 'max_staleness', 'snapshot_taken_at')}
+    router.mode = 'snapshot'
+    router.max_staleness = 3600
+    router.snapshot_path = str(tmp_path / 'analytics_snapshot.db')
+    with app.app_context():
+        router._take_snapshot(db.engine)
+    router.engine = _readonly_engine(router.snapshot_path, 1)
+    read_session.session_factory.configure(bind=router.engine)
+    app.jinja_env.fragment_cache.clear()
+    yield router
+    router.engine.dispose()
+    for name, value in saved.items():
+        setattr(router, name, value)
+    read_session.session_factory.configure(bind=router.engine)
+    app.jinja_env.fragment_cache.clear()
+
+
+def dashboard_product_count(client):
+    html = client.get('/dashboard').get_data(as_text=True)
+    return int(re.search(r'stat-number">(\d+)</div>\s*<div>Total Products', html).group(1))
+
+
+def test_dashboard_follows_the_snapshot_it_was_rendered_from(app, client, snapshot_mode):
+    with app.app_context():
+        products = Product.query.count()
+    assert dashboard_product_count(client) == products
+
+    response = client.post('/api/products', json={'product_name': 'Snapshot Widget', 'category': 'Test',
+                                                  'price': 1.0, 'initial_stock': 10})
+    assert response.status_code == 201
+    assert dashboard_product_count(client) == products  # the snapshot still lags
+
+    snapshot_mode.snapshot_taken_at = 0  # past the staleness bound
+    assert dashboard_product_count(client) == products + 1
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from models.database import db, StockMovement
+from models.ledger import SNAPSHOT_INTERVAL, stock_as_of
+
+
+def replayed(cutoff):
+    """Stock per product from the full ledger, the slow way"""
+    return dict(db.session.query(StockMovement.product_id, db.func.sum(StockMovement.quantity_change))
+                .filter(StockMovement.created_at < cutoff).group_by(StockMovement.product_id).all())
+
+
+def test_as_of_matches_full_replay(app, client, product_id):
+    for _ in range(SNAPSHOT_INTERVAL + 5):
+        assert client.post('/api/sales', json={'product_id': product_id, 'quantity_sold': 1}).status_code == 201
+    with app.app_context():
+        for cutoff in (datetime.utcnow() + timedelta(days=1), datetime.utcnow() - timedelta(days=1)):
+            expected = replayed(cutoff)
+            totals = stock_as_of(cutoff)
+            assert {pid: totals[pid] for pid in expected} == expected
+        tomorrow = datetime.utcnow() + timedelta(days=1)
+        assert stock_as_of(tomorrow, product_id=product_id) == {product_id: 500 - SNAPSHOT_INTERVAL - 5}
+
+
+def test_as_of_ranges_over_the_movement_index(app):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            stock_as_of(datetime.utcnow())
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+        statement, parameters = next(item for item in statements if 'stock_movements' in item[0])
+        rows = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)
+        plan = ' | '.join(row[-1] for row in rows if 'stock_movements' in row[-1])
+    assert 'SEARCH stock_movements USING INDEX ix_stock_movements_product' in plan, plan
+    assert 'SCAN stock_movements' not in plan, plan
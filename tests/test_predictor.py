@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+
+import pytest
+
+import ai.predictor as predictor
+from ai.singleflight import analytics_flight
+
+from conftest import sell
+
+
+def days_ago(days):
+    return (date.today() - timedelta(days=days)).isoformat()
+
+
+def predicted_sales(app, product_id):
+    analytics_flight.invalidate()
+    with app.app_context():
+        result = predictor.predict_low_stock()
+    assert result['success'], result
+    return next(p for p in result['predictions'] if p['product_id'] == product_id)['predicted_sales']
+
+
+@pytest.fixture
+def forecasts(app):
+    predictor._forecasts.clear()
+    yield predictor._forecasts
+    predictor._forecasts.clear()
+
+
+def test_unclassified_products_are_always_due(app, client, product_id, forecasts, monkeypatch):
+    monkeypatch.setattr(predictor, 'get_product_classes', lambda: {})
+    sell(client, product_id, 10, days_ago(3))
+    sell(client, product_id, 10, days_ago(2))
+    first = predicted_sales(app, product_id)
+    sell(client, product_id, 100, days_ago(1))
+    assert predicted_sales(app, product_id) != first
+
+
+def test_cached_forecasts_skip_grouping_the_history(app, client, product_id, forecasts, monkeypatch):
+    sell(client, product_id, 10, days_ago(3))
+    sell(client, product_id, 10, days_ago(2))
+    with app.app_context():
+        product_ids = [p['product_id'] for p in predictor.predict_low_stock()['predictions']]
+    monkeypatch.setattr(predictor, 'get_product_classes', lambda: {pid: {'abc': 'C'} for pid in product_ids})
+
+    grouped = []
+    group = predictor._sales_by_product
+    monkeypatch.setattr(predictor, '_sales_by_product', lambda columns, only=None: grouped.append(only) or group(columns, only))
+    first = predicted_sales(app, product_id)
+    assert grouped == []
+    forecasts.clear()
+    assert predicted_sales(app, product_id) == first
+    assert product_id in grouped[0]
@@ -0,0 +1,58 @@
+from models.database import db, Inventory, SalesPartition
+from models.sales_partitions import archive_sales, archive_table, sales_source
+
+from conftest import sell
+
+
+def archive(app, before_year):
+    with app.app_context():
+        archive_sales(before_year)
+
+
+def partition_totals(app, year):
+    with app.app_context():
+        partition = db.session.get(SalesPartition, year)
+        return partition.row_count, partition.total_quantity
+
+
+def stock(app, product_id):
+    with app.app_context():
+        return Inventory.query.filter_by(product_id=product_id).first().stock_quantity
+
+
+def test_new_sales_are_numbered_above_archived_ids(app, client, product_id):
+    sell(client, product_id, 2, '2016-03-01')
+    newest = sell(client, product_id, 3)
+    archive(app, 2017)
+    assert client.delete(f'/api/sales/{newest}').status_code == 200
+    with app.app_context():
+        top_archived = db.session.query(db.func.max(archive_table(2016).c.sale_id)).scalar()
+    assert sell(client, product_id, 1) > max(newest, top_archived)
+
+
+def test_delete_archived_sale(app, client, product_id):
+    sale_id = sell(client, product_id, 7, '2017-05-01')
+    archive(app, 2018)
+    rows, quantity = partition_totals(app, 2017)
+    before = stock(app, product_id)
+
+    response = client.delete(f'/api/sales/{sale_id}')
+    assert response.status_code == 200, response.get_json()
+    assert partition_totals(app, 2017) == (rows - 1, quantity - 7)
+    assert stock(app, product_id) == before + 7
+    with app.app_context():
+        sales = sales_source()
+        assert db.session.execute(db.select(sales.c.sale_id).where(sales.c.sale_id == sale_id)).first() is None
+    assert client.delete(f'/api/sales/{sale_id}').status_code == 404
+
+
+def test_delete_product_removes_its_archived_sales(app, client, product_id):
+    sell(client, product_id, 4, '2018-05-01')
+    archive(app, 2019)
+    rows, quantity = partition_totals(app, 2018)
+
+    assert client.delete(f'/api/products/{product_id}').status_code == 200
+    assert partition_totals(app, 2018) == (rows - 1, quantity - 4)
+    with app.app_context():
+        table = archive_table(2018)
+        assert db.session.execute(db.select(table).where(table.c.product_id == product_id)).first() is None
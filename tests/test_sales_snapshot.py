@@ -0,0 +1,31 @@
+from ai.sales_snapshot import get_sales_snapshot
+from models.database import db
+
+from conftest import sell
+
+
+def test_sales_table_uses_autoincrement(app):
+    with app.app_context():
+        sql = db.session.execute(db.text("SELECT sql FROM sqlite_master WHERE name = 'sales'")).scalar()
+    assert 'AUTOINCREMENT' in sql.upper()
+
+
+def test_deleted_newest_sale_id_is_not_reused(app, client, product_id):
+    newest = sell(client, product_id, 3)
+    assert client.delete(f'/api/sales/{newest}').status_code == 200
+    assert sell(client, product_id, 40) > newest
+
+
+def test_snapshot_drops_deleted_newest_sale(app, client, product_id):
+    with app.app_context():
+        before = int(get_sales_snapshot().product_totals(size=product_id + 1)[product_id])
+    newest = sell(client, product_id, 3)
+    with app.app_context():
+        assert get_sales_snapshot().product_totals(size=product_id + 1)[product_id] == before + 3
+
+    client.delete(f'/api/sales/{newest}')
+    sell(client, product_id, 40)
+    with app.app_context():
+        assert get_sales_snapshot().product_totals(size=product_id + 1)[product_id] == before + 40
+        snapshot_ids = set(get_sales_snapshot().arrays()['sale_id'].tolist())
+    assert newest not in snapshot_ids
@@ -0,0 +1,20 @@
+import time
+
+from ai.singleflight import SingleFlight
+
+
+def test_results_are_shared_within_ttl():
+    flight = SingleFlight(ttl=60)
+    calls = []
+    assert flight.do('key', lambda: calls.append(1) or 'first') == 'first'
+    assert flight.do('key', lambda: calls.append(1) or 'second') == 'first'
+    assert len(calls) == 1
+
+
+def test_expired_keys_are_evicted():
+    flight = SingleFlight(ttl=0.05)
+    for version in range(5):
+        flight.do(f'report:version={version}', lambda: version)
+    time.sleep(0.06)
+    flight.do('report:version=5', lambda: 5)
+    assert list(flight._cache) == ['report:version=5']
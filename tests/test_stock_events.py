@@ -0,0 +1,34 @@
+from models.stock_index import stock_index
+from services.events import event_bus
+
+
+def inventory_id_of(client, product_id):
+    return next(row['inventory_id'] for row in client.get('/api/inventory').get_json()
+                if row['product_id'] == product_id)
+
+
+def drain(subscription):
+    events = []
+    while True:
+        event = subscription.get(timeout=0)
+        if event is None:
+            return events
+        events.append(event)
+
+
+def test_low_stock_event_survives_index_reload(app, client, product_id):
+    inventory_id = inventory_id_of(client, product_id)
+    refresh_interval = stock_index.refresh_interval
+    # Reload from the database on every read, as a stale index would after its interval
+    stock_index.refresh_interval = -1
+    subscription = event_bus.subscribe()
+    try:
+        response = client.put(f'/api/inventory/{inventory_id}', json={'stock_quantity': 5})
+        assert response.status_code == 200
+        events = drain(subscription)
+    finally:
+        event_bus.unsubscribe(subscription)
+        stock_index.refresh_interval = refresh_interval
+
+    low_stock = [event for event in events if event.event_type == 'low_stock']
+    assert [event.data['product_id'] for event in low_stock] == [product_id]
@@ -0,0 +1,46 @@
+import pytest
+from flask import g
+from flask_login import login_user
+
+from models.database import db, TenantSession, User, Location, Product
+from models.tenancy import tenant_engines, route_bind, select_tenant, migrate_all
+
+
+@pytest.fixture
+def tenant_dir(app, tmp_path):
+    directory = tenant_engines.directory
+    tenant_engines.directory = str(tmp_path)
+    yield tmp_path
+    tenant_engines.dispose_all()
+    tenant_engines.directory = directory
+
+
+def add_user(username, company_name):
+    user = User(username=username, email=f'{username}@example.com', company_name=company_name)
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    return user.user_id
+
+
+def test_migrate_provisions_every_users_company(app, tenant_dir):
+    with app.app_context():
+        add_user('tenancy_migrate', 'Migrate Co')
+        assert 'migrate-co' in migrate_all()
+        assert (tenant_dir / 'migrate-co.db').exists()
+
+
+def test_first_request_provisions_a_missing_tenant(app, tenant_dir):
+    with app.app_context():
+        user_id = add_user('tenancy_lazy', 'Lazy Co')
+    TenantSession.route_bind = staticmethod(route_bind)
+    try:
+        with app.test_request_context('/'):
+            login_user(db.session.get(User, user_id))
+            select_tenant()
+            assert g.tenant == 'lazy-co'
+            assert Location.query.filter_by(is_default=True).count() == 1
+            assert Product.query.count() == 0
+    finally:
+        TenantSession.route_bind = None
+    assert (tenant_dir / 'lazy-co.db').exists()